@@ -25,6 +25,7 @@ import re
 from constants import REPORT_DIR, OUT_DIR
 from utils.report import ReportBuilder
 from utils.df import df_info, standardize_column_names as std_col_names
+from utils.fs import write_parquet
 from utils.country import (
     is_aggregate,
     standardize_country_name,
@@ -35,6 +36,9 @@ from utils.country import (
 
 CLEANED_DIR = os.path.join(OUT_DIR, "cleaned")
 
+# Liczba zapisana jako tekst: opcjonalny znak, waluta, separatory tysięcy, %
+_NUMERIC_LITERAL_RE = re.compile(r"^[-+]?[\$€£]?[\d,\s]+\.?\d*%?$")
+
 
 def standardize_column_names(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]]:
     """
@@ -62,8 +66,10 @@ def filter_aggregates(df: pd.DataFrame, country_col: str = "country") -> Tuple[p
     if country_col not in df.columns:
         return df, []
 
-    aggregates_found = df[df[country_col].apply(is_aggregate)][country_col].unique().tolist()
-    df_filtered = df[~df[country_col].apply(is_aggregate)].copy()
+    # is_aggregate wywoływane raz na unikalną nazwę, nie na każdy wiersz
+    names = df[country_col].dropna().unique()
+    aggregates_found = [name for name in names if is_aggregate(name)]
+    df_filtered = df[~df[country_col].isin(aggregates_found)].copy()
 
     return df_filtered, aggregates_found
 
@@ -90,18 +96,18 @@ def standardize_country_names_in_df(df: pd.DataFrame, country_col: str = "countr
         return df, {}
 
     df = df.copy()
-    original_names = df[country_col].unique().tolist()
+    original_names = df[country_col].dropna().unique().tolist()
     name_mapping = {}
 
     for name in original_names:
-        if pd.isna(name):
-            continue
         standardized = standardize_country_name(str(name))
         if standardized != name:
             name_mapping[name] = standardized
 
     if name_mapping:
-        df[country_col] = df[country_col].replace(name_mapping)
+        # Pełne mapowanie unikalnych nazw -> jedno wektorowe .map() zamiast replace
+        full_mapping = {name: name_mapping.get(name, name) for name in original_names}
+        df[country_col] = df[country_col].map(full_mapping)
 
     return df, name_mapping
 
@@ -119,11 +125,46 @@ def add_iso_codes(df: pd.DataFrame, country_col: str = "country",
     # Uzupełnij brakujące kody ISO
     mask = df[iso_col].isna()
     if mask.any():
-        df.loc[mask, iso_col] = df.loc[mask, country_col].apply(get_country_iso)
+        missing_names = df.loc[mask, country_col]
+        iso_by_name = {name: get_country_iso(name) for name in missing_names.dropna().unique()}
+        df.loc[mask, iso_col] = missing_names.map(iso_by_name)
 
     return df
 
 
+def fix_data_types(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Konwersja kolumn tekstowych zawierających sformatowane liczby
+    (separatory tysięcy, znaki $, %) na typ numeryczny.
+
+    Returns:
+        Tuple (DataFrame z poprawionymi typami, lista skonwertowanych kolumn)
+    """
+    df = df.copy()
+    converted = []
+
+    # Typy kolumn z jednego słownika - kolumny już numeryczne pomijamy
+    # bez odczytywania ich wartości (tekst to object lub StringDtype,
+    # domyślny typ tekstu w pandas 3)
+    for col, dtype in df.dtypes.to_dict().items():
+        if not (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)):
+            continue
+
+        # Sprawdź czy wygląda na liczbę z formatowaniem (jedno wektorowe
+        # dopasowanie regexu na próbce zamiast pętli w Pythonie)
+        sample = df[col].dropna().head(100)
+        if sample.astype(str).str.match(_NUMERIC_LITERAL_RE).mean() > 0.5:
+            try:
+                # Usuń znaki walut, %, separatory i spróbuj przekonwertować
+                df[col] = df[col].replace(r'[\$€£,%\s]', '', regex=True)
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+                converted.append(col)
+            except:
+                pass
+
+    return df, converted
+
+
 def validate_percentage_columns(df: pd.DataFrame, columns: List[str]) -> Dict[str, int]:
     """
     Walidacja kolumn procentowych (0-100).
@@ -132,11 +173,17 @@ def validate_percentage_columns(df: pd.DataFrame, columns: List[str]) -> Dict[st
         Dict z liczbą wartości poza zakresem dla każdej kolumny
     """
     issues = {}
+    dtypes = df.dtypes.to_dict()
     for col in columns:
-        if col in df.columns:
-            invalid_count = ((df[col] < 0) | (df[col] > 100)).sum()
-            if invalid_count > 0:
-                issues[col] = int(invalid_count)
+        dtype = dtypes.get(col)
+        if dtype is None or not pd.api.types.is_numeric_dtype(dtype):
+            continue
+        # Liczenie bezpośrednio na buforze numpy (bez kopii i bez
+        # pośrednich Series z maskami); NaN daje False w porównaniach
+        arr = df[col].to_numpy(copy=False)
+        invalid_count = np.count_nonzero((arr < 0) | (arr > 100))
+        if invalid_count > 0:
+            issues[col] = int(invalid_count)
     return issues
 
 
@@ -148,11 +195,15 @@ def validate_positive_columns(df: pd.DataFrame, columns: List[str]) -> Dict[str,
         Dict z liczbą ujemnych wartości dla każdej kolumny
     """
     issues = {}
+    dtypes = df.dtypes.to_dict()
     for col in columns:
-        if col in df.columns:
-            negative_count = (df[col] < 0).sum()
-            if negative_count > 0:
-                issues[col] = int(negative_count)
+        dtype = dtypes.get(col)
+        if dtype is None or not pd.api.types.is_numeric_dtype(dtype):
+            continue
+        arr = df[col].to_numpy(copy=False)
+        negative_count = np.count_nonzero(arr < 0)
+        if negative_count > 0:
+            issues[col] = int(negative_count)
     return issues
 
 
@@ -246,7 +297,15 @@ def clean_sustainable_energy_dataset(df: pd.DataFrame) -> Tuple[pd.DataFrame, Di
     df = add_iso_codes(df, "country", "iso_code")
 
     # 6. Walidacja kolumn procentowych
-    pct_cols = [col for col in df.columns if "%" in col or "share" in col.lower()]
+    # Nazwa małymi literami i typ liczony raz na kolumnę
+    col_meta = {
+        col: (col.lower(), pd.api.types.is_numeric_dtype(dtype))
+        for col, dtype in df.dtypes.to_dict().items()
+    }
+    pct_cols = [
+        col for col, (col_lower, is_num) in col_meta.items()
+        if is_num and ("%" in col or "share" in col_lower)
+    ]
     cleaning_info["validation_percentage"] = validate_percentage_columns(df, pct_cols)
 
     cleaning_info["final_rows"] = len(df)
@@ -288,20 +347,8 @@ def clean_countries_dataset(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
     df = add_iso_codes(df, "country", "iso_code")
 
     # 6. Konwersja kolumn numerycznych (usunięcie separatorów tysięcy, znaków $, % etc.)
-    for col in df.columns:
-        if df[col].dtype == object:
-            # Sprawdź czy wygląda na liczbę z formatowaniem
-            sample = df[col].dropna().head(10)
-            if len(sample) > 0:
-                sample_str = str(sample.iloc[0])
-                if any(c.isdigit() for c in sample_str):
-                    try:
-                        # Usuń $, %, , i spróbuj przekonwertować
-                        df[col] = df[col].replace(r'[\$,%]', '', regex=True)
-                        df[col] = df[col].replace(r',', '', regex=True)
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                    except:
-                        pass
+    df, converted_cols = fix_data_types(df)
+    cleaning_info["numeric_conversions"] = len(converted_cols)
 
     cleaning_info["final_rows"] = len(df)
     cleaning_info["final_cols"] = len(df.columns)
@@ -317,12 +364,23 @@ def save_cleaned_data(df: pd.DataFrame, name: str) -> str:
     Returns:
         Ścieżka do zapisanego pliku
     """
-    os.makedirs(CLEANED_DIR, exist_ok=True)
     path = os.path.join(CLEANED_DIR, f"{name}.parquet")
-    df.to_parquet(path, index=False)
+    # zstd + kodowanie słownikowe (powtarzające się nazwy krajów), mniejsze row groups
+    write_parquet(
+        df, path,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=True,
+        row_group_size=64_000
+    )
     return path
 
 
+def _key_value_rows(data: Dict) -> List[dict]:
+    """Wiersze tabeli Metric/Value dla add_dict_table (bez budowania DataFrame)."""
+    return [{"Metric": key, "Value": value} for key, value in data.items()]
+
+
 def generate_cleaning_report(
     info_owid: Dict,
     info_energy: Dict,
@@ -363,7 +421,7 @@ def generate_cleaning_report(
     report.add_heading("OWID CO2 Data", level=2)
 
     report.add_heading("Podsumowanie zmian", level=3)
-    report.add_key_value_table({
+    report.add_dict_table(_key_value_rows({
         "Wiersze (przed)": f"{info_owid['original_rows']:,}",
         "Wiersze (po)": f"{info_owid['final_rows']:,}",
         "Usunięte wiersze": f"{info_owid['original_rows'] - info_owid['final_rows']:,}",
@@ -371,7 +429,7 @@ def generate_cleaning_report(
         "Unikalne kraje": info_owid['unique_countries'],
         "Unikalne lata": info_owid['unique_years'],
         "Zakres lat": info_owid['year_range']
-    })
+    }))
 
     report.add_heading("Usunięte agregaty", level=3)
     report.add_paragraph(f"Usunięto {info_owid['aggregates_removed']} agregatów regionalnych:")
@@ -400,13 +458,13 @@ def generate_cleaning_report(
     report.add_heading("Sustainable Energy", level=2)
 
     report.add_heading("Podsumowanie zmian", level=3)
-    report.add_key_value_table({
+    report.add_dict_table(_key_value_rows({
         "Wiersze (przed)": f"{info_energy['original_rows']:,}",
         "Wiersze (po)": f"{info_energy['final_rows']:,}",
         "Kolumny (przed)": info_energy['original_cols'],
         "Kolumny (po)": info_energy['final_cols'],
         "Unikalne kraje": info_energy['unique_countries']
-    })
+    }))
 
     if info_energy.get('column_mapping'):
         report.add_heading("Przykłady zmian nazw kolumn", level=3)
@@ -420,13 +478,13 @@ def generate_cleaning_report(
     report.add_heading("Countries 2023", level=2)
 
     report.add_heading("Podsumowanie zmian", level=3)
-    report.add_key_value_table({
+    report.add_dict_table(_key_value_rows({
         "Wiersze (przed)": f"{info_countries['original_rows']:,}",
         "Wiersze (po)": f"{info_countries['final_rows']:,}",
         "Kolumny (przed)": info_countries['original_cols'],
         "Kolumny (po)": info_countries['final_cols'],
         "Unikalne kraje": info_countries['unique_countries']
-    })
+    }))
 
     # ==========================================================================
     # 5. Porównanie krajów między zbiorami
@@ -441,13 +499,13 @@ def generate_cleaning_report(
     common_all = countries_owid & countries_energy & countries_2023
     common_owid_energy = countries_owid & countries_energy
 
-    report.add_key_value_table({
+    report.add_dict_table(_key_value_rows({
         "Kraje w OWID CO2": len(countries_owid),
         "Kraje w Sustainable Energy": len(countries_energy),
         "Kraje w Countries 2023": len(countries_2023),
         "Wspólne (wszystkie 3)": len(common_all),
         "Wspólne (OWID + Energy)": len(common_owid_energy)
-    })
+    }))
 
     # Kraje tylko w jednym zbiorze
     only_owid = countries_owid - countries_energy - countries_2023
@@ -17,10 +17,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import os
+from pandas.api.types import union_categoricals
 
 from constants import REPORT_DIR, OUT_DIR
 from utils.report import ReportBuilder
 from utils.df import df_info
+from utils.fs import write_parquet_chunked
 
 
 MERGED_DIR = os.path.join(OUT_DIR, "merged")
@@ -37,21 +39,44 @@ def merge_owid_sustainable(
     Returns:
         Tuple (polaczony DataFrame, statystyki laczenia)
     """
+    # Unikalne kraje obu zbiorow liczone raz - kategorie sluza do statystyk,
+    # wspolnego typu klucza i analizy pokrycia (bez kolejnych unique())
+    owid_cat = df_owid["country"].astype("category").array
+    energy_cat = df_energy["country"].astype("category").array
+
     stats = {
         "owid_rows": len(df_owid),
         "energy_rows": len(df_energy),
-        "owid_countries": df_owid["country"].nunique(),
-        "energy_countries": df_energy["country"].nunique()
+        "owid_countries": len(owid_cat.categories),
+        "energy_countries": len(energy_cat.categories),
+        "owid_country_names": owid_cat.categories,
+        "energy_country_names": energy_cat.categories
     }
 
-    # Upewnij sie, ze kolumna year jest typu int
-    df_owid = df_owid.copy()
-    df_energy = df_energy.copy()
-
-    if "year" in df_owid.columns:
-        df_owid["year"] = df_owid["year"].astype(int)
-    if "year" in df_energy.columns:
-        df_energy["year"] = df_energy["year"].astype(int)
+    # Plytkie kopie - podmieniamy tylko pojedyncze kolumny, wiec nie trzeba
+    # kopiowac calych zbiorow, a ramki wywolujacego pozostaja nienaruszone
+    df_owid = df_owid.copy(deep=False)
+    df_energy = df_energy.copy(deep=False)
+
+    # Upewnij sie, ze kolumna year jest typu int (int16 - lata mieszcza sie w 2 bajtach)
+    if "year" in df_owid.columns and df_owid["year"].dtype != np.int16:
+        df_owid["year"] = df_owid["year"].astype(np.int16)
+    if "year" in df_energy.columns and df_energy["year"].dtype != np.int16:
+        df_energy["year"] = df_energy["year"].astype(np.int16)
+
+    # Wspolny typ kategoryczny dla country - join porownuje kody int zamiast
+    # napisow; kategorie posortowane, wiec kolejnosc kodow = kolejnosc nazw
+    if "country" in on:
+        country_dtype = pd.CategoricalDtype(union_categoricals(
+            [owid_cat, energy_cat], sort_categories=True
+        ).categories)
+        df_owid["country"] = df_owid["country"].astype(country_dtype)
+        df_energy["country"] = df_energy["country"].astype(country_dtype)
+
+    # Oba zbiory uporzadkowane po kluczu (dane panelowe zwykle juz sa, wiec
+    # stabilne sortowanie jest tanie) - indeks energy jest monotoniczny
+    df_owid = df_owid.sort_values(on, kind="mergesort")
+    df_energy = df_energy.sort_values(on, kind="mergesort")
 
     # Identyfikuj kolumny do usuniecia z energy (duplikaty)
     common_cols = set(df_owid.columns) & set(df_energy.columns) - set(on)
@@ -60,19 +85,24 @@ def merge_owid_sustainable(
     if energy_cols_to_drop:
         df_energy = df_energy.drop(columns=energy_cols_to_drop)
 
-    # Laczenie - left join, aby zachowac wszystkie wiersze z OWID
-    df_merged = pd.merge(
-        df_owid,
+    # Laczenie - left join po indeksie (country, year), aby zachowac wszystkie
+    # wiersze z OWID
+    df_energy = df_energy.set_index(on)
+    # Znacznik dopasowania (odpowiednik indicator= z pd.merge)
+    df_energy["_merge_flag"] = np.int8(1)
+    # Bez sufiksow - wspolne kolumny zostaly usuniete z energy powyzej
+    df_merged = df_owid.join(
         df_energy,
         on=on,
-        how="left",
-        suffixes=("", "_energy")
+        how="left"
     )
+    # Nowy RangeIndex w miejscu - reset_index() kopiowalby cala ramke
+    df_merged.index = pd.RangeIndex(len(df_merged))
 
     # Statystyki
     stats["merged_rows"] = len(df_merged)
     stats["merged_countries"] = df_merged["country"].nunique()
-    stats["matched_rows"] = df_merged[df_energy.columns.difference(on).tolist()[0] if len(df_energy.columns) > len(on) else "country"].notna().sum() if len(df_energy.columns) > len(on) else 0
+    stats["matched_rows"] = int(df_merged.pop("_merge_flag").notna().sum())
     stats["dropped_energy_cols"] = energy_cols_to_drop
     stats["new_cols_from_energy"] = [c for c in df_merged.columns if c not in df_owid.columns]
 
@@ -99,21 +129,38 @@ def add_country_metadata(
     # Wybor kolumn z Countries 2023 do dodania
     # Unikamy duplikatow z istniejacymi kolumnami
     existing_cols = set(df_panel.columns)
-    new_cols = [c for c in df_countries.columns if c not in existing_cols or c == on]
+    dup_cols = [c for c in df_countries.columns if c != on and c in existing_cols]
+    new_cols = [c for c in df_countries.columns if c == on or c not in existing_cols]
 
     # Jesli sa kolumny do dodania
     if len(new_cols) > 1:  # wiecej niz tylko 'country'
-        df_countries_subset = df_countries[new_cols].copy()
+        # drop() zwraca nowa ramke; bez duplikatow wystarczy plytka kopia
+        # (podmieniamy co najwyzej kolumne klucza)
+        if dup_cols:
+            df_countries_subset = df_countries.drop(columns=dup_cols)
+        else:
+            df_countries_subset = df_countries.copy(deep=False)
+
+        # Klucz w typie kategorycznym panelu (join na kodach); kraje spoza
+        # panelu i tak nie zostalyby dopasowane w left join
+        if isinstance(df_panel[on].dtype, pd.CategoricalDtype):
+            df_countries_subset[on] = df_countries_subset[on].astype(df_panel[on].dtype)
+            df_countries_subset = df_countries_subset[df_countries_subset[on].notna()]
 
-        df_merged = pd.merge(
-            df_panel,
-            df_countries_subset,
+        # Left join po indeksie, tak jak przy laczeniu z Sustainable Energy
+        df_merged = df_panel.join(
+            df_countries_subset.set_index(on),
             on=on,
             how="left"
         )
+        df_merged.index = pd.RangeIndex(len(df_merged))
     else:
         df_merged = df_panel.copy()
 
+    # Powrot do typu tekstowego - kolejne kroki grupuja po country bez observed=True
+    if isinstance(df_merged[on].dtype, pd.CategoricalDtype):
+        df_merged[on] = df_merged[on].astype(df_merged[on].cat.categories.dtype)
+
     stats["final_rows"] = len(df_merged)
     stats["final_cols"] = len(df_merged.columns)
     stats["new_cols"] = [c for c in new_cols if c != on]
@@ -121,10 +168,17 @@ def add_country_metadata(
     return df_merged, stats
 
 
-def validate_merge(df: pd.DataFrame, key_cols: List[str]) -> Dict:
+def validate_merge(
+    df: pd.DataFrame,
+    key_cols: List[str],
+    n_countries: Optional[int] = None
+) -> Dict:
     """
     Walidacja jakosci polaczonego zbioru.
 
+    Args:
+        n_countries: Liczba krajow, jesli juz policzona (pomija nunique())
+
     Returns:
         Dict z wynikami walidacji
     """
@@ -136,9 +190,10 @@ def validate_merge(df: pd.DataFrame, key_cols: List[str]) -> Dict:
 
     # Sprawdz kompletnosc kluczowych zmiennych
     key_vars = ["co2", "co2_per_capita", "gdp", "population"]
-    for var in key_vars:
-        if var in df.columns:
-            validation[f"{var}_coverage"] = round(df[var].notna().sum() / len(df) * 100, 2)
+    present_vars = [var for var in key_vars if var in df.columns]
+    coverage = (df[present_vars].notna().mean() * 100).round(2)
+    for var, pct in coverage.items():
+        validation[f"{var}_coverage"] = float(pct)
 
     # Zakres czasowy
     if "year" in df.columns:
@@ -147,7 +202,9 @@ def validate_merge(df: pd.DataFrame, key_cols: List[str]) -> Dict:
         validation["unique_years"] = int(df["year"].nunique())
 
     # Liczba krajow
-    if "country" in df.columns:
+    if n_countries is not None:
+        validation["unique_countries"] = int(n_countries)
+    elif "country" in df.columns:
         validation["unique_countries"] = int(df["country"].nunique())
 
     return validation
@@ -156,41 +213,41 @@ def validate_merge(df: pd.DataFrame, key_cols: List[str]) -> Dict:
 def analyze_merge_coverage(
     df_owid: pd.DataFrame,
     df_energy: pd.DataFrame,
-    df_merged: pd.DataFrame
+    df_merged: pd.DataFrame,
+    owid_countries: Optional[pd.Index] = None,
+    energy_countries: Optional[pd.Index] = None
 ) -> pd.DataFrame:
     """
     Analiza pokrycia krajow i lat miedzy zbiorami.
 
+    Args:
+        owid_countries: Unikalne kraje OWID, jesli juz znane (np. ze statystyk laczenia)
+        energy_countries: Unikalne kraje Energy, jesli juz znane
+
     Returns:
         DataFrame z analiza pokrycia
     """
     # Kraje
-    owid_countries = set(df_owid["country"].unique())
-    energy_countries = set(df_energy["country"].unique())
-
-    # Lata w energy
-    energy_years = set(df_energy["year"].unique()) if "year" in df_energy.columns else set()
-    owid_years = set(df_owid["year"].unique()) if "year" in df_owid.columns else set()
-
-    coverage_data = []
-
-    for country in sorted(owid_countries):
-        in_owid = country in owid_countries
-        in_energy = country in energy_countries
-
-        if "year" in df_merged.columns:
-            merged_years = df_merged[df_merged["country"] == country]["year"].nunique()
-        else:
-            merged_years = 0
-
-        coverage_data.append({
-            "country": country,
-            "in_owid": in_owid,
-            "in_energy": in_energy,
-            "years_in_merged": merged_years
-        })
+    if owid_countries is None:
+        owid_countries = df_owid["country"].dropna().unique()
+    if energy_countries is None:
+        energy_countries = df_energy["country"].dropna().unique()
+    countries = pd.Index(sorted(owid_countries))
+    in_energy = countries.isin(energy_countries)
+
+    # Liczba lat na kraj - jedna agregacja zamiast maski dla kazdego kraju
+    if "year" in df_merged.columns:
+        years_per_country = df_merged.groupby("country", observed=True, sort=False)["year"].nunique()
+        merged_years = years_per_country.reindex(countries, fill_value=0).to_numpy()
+    else:
+        merged_years = 0
 
-    return pd.DataFrame(coverage_data)
+    return pd.DataFrame({
+        "country": countries,
+        "in_owid": True,
+        "in_energy": in_energy,
+        "years_in_merged": merged_years
+    })
 
 
 def generate_merging_report(
@@ -208,6 +265,12 @@ def generate_merging_report(
     """
     report = ReportBuilder(title="Laczenie zbiorow danych")
 
+    # Wymiary i kolumny polaczonego zbioru - wyliczone raz dla calego raportu
+    cols = df_merged.columns.tolist()
+    col_set = set(cols)
+    n_rows = len(df_merged)
+    n_cols = len(cols)
+
     # ==========================================================================
     # 1. Wprowadzenie
     # ==========================================================================
@@ -298,8 +361,8 @@ OWID CO2 Data                    Sustainable Energy Data
 
     report.add_heading("Ogolne statystyki", level=3)
     report.add_key_value_table({
-        "Liczba wierszy": f"{len(df_merged):,}",
-        "Liczba kolumn": len(df_merged.columns),
+        "Liczba wierszy": f"{n_rows:,}",
+        "Liczba kolumn": n_cols,
         "Unikalne kraje": validation['unique_countries'],
         "Zakres lat": f"{validation['year_min']} - {validation['year_max']}",
         "Unikalne lata": validation['unique_years']
@@ -349,13 +412,20 @@ OWID CO2 Data                    Sustainable Energy Data
     report.add_heading("Struktura finalnego zbioru", level=2)
 
     # Pogrupuj kolumny wedlug kategorii
+    # Jedno przejscie po kolumnach (kolumna moze nalezec do kilku grup)
     id_cols = ["country", "year", "iso_code"]
-    emission_cols = [c for c in df_merged.columns if "co2" in c.lower() or "ghg" in c.lower() or "emission" in c.lower()]
-    energy_cols = [c for c in df_merged.columns if "energy" in c.lower() or "electricity" in c.lower() or "renewable" in c.lower()]
-    economic_cols = [c for c in df_merged.columns if "gdp" in c.lower() or "population" in c.lower()]
+    emission_cols, energy_cols, economic_cols = [], [], []
+    for c in cols:
+        lc = c.lower()
+        if "co2" in lc or "ghg" in lc or "emission" in lc:
+            emission_cols.append(c)
+        if "energy" in lc or "electricity" in lc or "renewable" in lc:
+            energy_cols.append(c)
+        if "gdp" in lc or "population" in lc:
+            economic_cols.append(c)
 
     report.add_heading("Kolumny identyfikujace", level=3)
-    report.add_paragraph(", ".join([f"`{c}`" for c in id_cols if c in df_merged.columns]))
+    report.add_paragraph(", ".join([f"`{c}`" for c in id_cols if c in col_set]))
 
     report.add_heading("Kolumny emisji (wybrane)", level=3)
     report.add_paragraph(", ".join([f"`{c}`" for c in emission_cols[:10]]))
@@ -373,10 +443,10 @@ OWID CO2 Data                    Sustainable Energy Data
     report.add_heading("Podsumowanie", level=2)
 
     report.add_paragraph("**Wynik laczenia:**")
-    report.add_numbered(f"Polaczony zbior panelowy: {len(df_merged):,} obserwacji", 1)
+    report.add_numbered(f"Polaczony zbior panelowy: {n_rows:,} obserwacji", 1)
     report.add_numbered(f"Liczba krajow: {validation['unique_countries']}", 2)
     report.add_numbered(f"Zakres czasowy: {validation['year_min']}-{validation['year_max']}", 3)
-    report.add_numbered(f"Liczba zmiennych: {len(df_merged.columns)}", 4)
+    report.add_numbered(f"Liczba zmiennych: {n_cols}", 4)
 
     report.add_paragraph("**Zapisany plik:**")
     report.add_bullet("`out/merged/merged_panel.parquet`")
@@ -398,22 +468,38 @@ def save_merged_data(df: pd.DataFrame, name: str) -> str:
     Returns:
         Sciezka do zapisanego pliku
     """
-    os.makedirs(MERGED_DIR, exist_ok=True)
     path = os.path.join(MERGED_DIR, f"{name}.parquet")
-    df.to_parquet(path, index=False)
+    # zstd + slownik dla powtarzalnych nazw krajow; statystyki min/max w
+    # grupach wierszy pozwalaja pomijac strony przy odczycie po country/year.
+    # Zapis po kawalkach - do Arrow konwertowana jest jedna grupa wierszy naraz
+    dict_cols = [c for c in ("country", "iso_code") if c in df.columns]
+    write_parquet_chunked(
+        df, path,
+        chunk_size=200_000,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=dict_cols,
+        dictionary_pagesize_limit=4 * 1024 * 1024,
+        write_statistics=True
+    )
     return path
 
 
 def run_step_03(
     df_owid: pd.DataFrame,
     df_energy: pd.DataFrame,
-    df_countries: pd.DataFrame
-) -> Tuple[pd.DataFrame, str]:
+    df_countries: pd.DataFrame,
+    generate_report: bool = True
+) -> Tuple[pd.DataFrame, Optional[str]]:
     """
     Uruchamia krok 3: Laczenie danych.
 
+    Args:
+        generate_report: Czy liczyc pokrycie krajow i zapisac raport
+            (False - tylko laczenie, walidacja i zapis danych)
+
     Returns:
-        Tuple (polaczony DataFrame, sciezka do raportu)
+        Tuple (polaczony DataFrame, sciezka do raportu lub None)
     """
     print("=" * 60)
     print("Krok 3: Laczenie zbiorow danych")
@@ -431,18 +517,29 @@ def run_step_03(
 
     # 3. Walidacja
     print("\n  Walidacja polaczonego zbioru...")
-    validation = validate_merge(df_merged, ["country", "year"])
+    # Left join z metadanymi nie zmienia zbioru krajow - liczba z kroku laczenia
+    validation = validate_merge(
+        df_merged, ["country", "year"],
+        n_countries=merge_stats["merged_countries"]
+    )
     print(f"    Unikalne kraje: {validation['unique_countries']}")
     print(f"    Zakres lat: {validation['year_min']}-{validation['year_max']}")
 
-    # 4. Analiza pokrycia
-    coverage_df = analyze_merge_coverage(df_owid, df_energy, df_merged)
-
-    # 5. Zapisanie danych
+    # 4. Zapisanie danych
     print("\n  Zapisywanie polaczonego zbioru...")
     save_merged_data(df_merged, "merged_panel")
     print(f"    Zapisano w: {MERGED_DIR}")
 
+    if not generate_report:
+        return df_merged, None
+
+    # 5. Analiza pokrycia (potrzebna tylko w raporcie)
+    coverage_df = analyze_merge_coverage(
+        df_owid, df_energy, df_merged,
+        owid_countries=merge_stats["owid_country_names"],
+        energy_countries=merge_stats["energy_country_names"]
+    )
+
     # 6. Generowanie raportu
     print("\n  Generowanie raportu...")
     report_path = generate_merging_report(
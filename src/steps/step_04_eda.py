@@ -6,12 +6,14 @@ Funkcje:
 - compute_descriptive_stats() - statystyki opisowe
 - analyze_distributions() - rozklady zmiennych
 - compute_correlations() - macierz korelacji
+- compute_yearly_aggregates() - agregacja roczna
 - analyze_trends() - trendy czasowe
 - analyze_by_region() - porownania regionalne
 
 Output:
 - out/eda/descriptive_stats.csv
 - out/eda/correlation_matrix.csv
+- out/eda/descriptive_stats.parquet, out/eda/correlation_matrix.parquet
 - report/04_eda.md
 - report/figures/eda/*.png
 """
@@ -20,20 +22,21 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 
 from constants import REPORT_DIR, OUT_DIR
-from utils.report import ReportBuilder
-from utils.df import df_describe_all, correlation_matrix, top_correlations
-from utils.plotting import (
-    plot_histogram, plot_boxplot, plot_correlation_heatmap,
-    plot_scatter, plot_time_series, plot_trends_by_group,
-    save_figure, FIGURES_DIR
-)
+from utils.report import ReportBuilder, markdown_table
+from utils.fs import write_parquet
+from utils.df import df_describe_all, describe_numeric, correlation_matrix, top_correlations_from_matrix
 from utils.country import get_region, add_region_column
+from utils.plot_jobs import render_plots
+from utils.processing import get_worker_cpu
 
 
 EDA_DIR = os.path.join(OUT_DIR, "eda")
-EDA_FIGURES_DIR = os.path.join(FIGURES_DIR, "eda")
+# Ta sama sciezka co utils.plotting.FIGURES_DIR / "eda" - bez importu matplotlib
+EDA_FIGURES_DIR = os.path.join(REPORT_DIR, "figures", "eda")
 
 
 def compute_descriptive_stats(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
@@ -46,27 +49,31 @@ def compute_descriptive_stats(df: pd.DataFrame, columns: Optional[List[str]] = N
     if columns is None:
         columns = df.select_dtypes(include=[np.number]).columns.tolist()
 
-    stats = []
-    for col in columns:
-        if col in df.columns:
-            s = df[col].dropna()
-            stats.append({
-                "variable": col,
-                "count": len(s),
-                "missing": df[col].isna().sum(),
-                "missing_pct": round(df[col].isna().sum() / len(df) * 100, 2),
-                "mean": round(s.mean(), 4) if len(s) > 0 else np.nan,
-                "std": round(s.std(), 4) if len(s) > 0 else np.nan,
-                "min": round(s.min(), 4) if len(s) > 0 else np.nan,
-                "q25": round(s.quantile(0.25), 4) if len(s) > 0 else np.nan,
-                "median": round(s.median(), 4) if len(s) > 0 else np.nan,
-                "q75": round(s.quantile(0.75), 4) if len(s) > 0 else np.nan,
-                "max": round(s.max(), 4) if len(s) > 0 else np.nan,
-                "skewness": round(s.skew(), 4) if len(s) > 2 else np.nan,
-                "kurtosis": round(s.kurtosis(), 4) if len(s) > 3 else np.nan
-            })
+    columns = [col for col in columns if col in df.columns]
+    if not columns:
+        return pd.DataFrame()
+
+    # Statystyki i momenty z jednego bloku float64 (jedno sortowanie na
+    # zmienna) zamiast osobnych przebiegow describe() i agg(skew, kurt);
+    # skosnosc/kurtoza NaN dla zbyt malej liczby obserwacji, jak w pandas
+    num = df[columns]
+    desc = describe_numeric(num, columns)
+
+    # Maska brakow raz dla calego bloku - liczba brakow i obserwacji z jednej
+    # redukcji po kolumnach
+    missing = num.isna().to_numpy().sum(axis=0)
+
+    metric_cols = ["mean", "std", "min", "q25", "median", "q75", "max", "skewness", "kurtosis"]
+
+    stats = pd.DataFrame({
+        "variable": columns,
+        "count": len(df) - missing,
+        "missing": missing,
+        "missing_pct": np.round(missing / len(df) * 100, 2),
+        **{name: np.round(desc[name].to_numpy(dtype=np.float64), 4) for name in metric_cols}
+    })
 
-    return pd.DataFrame(stats)
+    return stats
 
 
 def analyze_key_variables(df: pd.DataFrame) -> Dict:
@@ -87,17 +94,21 @@ def analyze_key_variables(df: pd.DataFrame) -> Dict:
     analysis = {}
     for var, name in key_vars.items():
         if var in df.columns:
-            s = df[var].dropna()
+            # Jeden przebieg numpy po surowej kolumnie zamiast serii redukcji
+            # na tymczasowych Series
+            arr = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+            vals = arr[~np.isnan(arr)]
+            n = vals.size
             analysis[var] = {
                 "name": name,
-                "count": len(s),
-                "mean": s.mean(),
-                "std": s.std(),
-                "min": s.min(),
-                "max": s.max(),
-                "median": s.median(),
-                "zeros": (s == 0).sum(),
-                "negatives": (s < 0).sum()
+                "count": n,
+                "mean": vals.mean() if n else np.nan,
+                "std": vals.std(ddof=1) if n > 1 else np.nan,
+                "min": vals.min() if n else np.nan,
+                "max": vals.max() if n else np.nan,
+                "median": np.median(vals) if n else np.nan,
+                "zeros": np.count_nonzero(vals == 0),
+                "negatives": np.count_nonzero(vals < 0)
             }
 
     return analysis
@@ -116,16 +127,40 @@ def compute_correlation_analysis(df: pd.DataFrame, key_cols: List[str]) -> Tuple
     if len(existing_cols) < 2:
         return pd.DataFrame(), pd.DataFrame()
 
+    # Macierz liczona raz - top korelacje wybierane z tej samej macierzy
     corr_matrix = correlation_matrix(df, existing_cols)
-    top_corr = top_correlations(df[existing_cols], n=20)
+    top_corr = top_correlations_from_matrix(corr_matrix, n=20)
 
     return corr_matrix, top_corr
 
 
-def analyze_temporal_trends(df: pd.DataFrame) -> Dict:
+def compute_yearly_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregacja roczna wspolna dla analizy trendow i wykresow trendow.
+
+    Returns:
+        DataFrame indeksowany rokiem (co2_sum, co2_mean, co2_per_capita_mean,
+        gdp_sum, country_nunique)
+    """
+    yearly_agg = df.groupby("year", observed=True).agg({
+        "co2": ["sum", "mean"],
+        "co2_per_capita": "mean",
+        "gdp": "sum",
+        "country": "nunique"
+    })
+
+    # Splaszcz nazwy kolumn
+    yearly_agg.columns = ["_".join(col).strip() for col in yearly_agg.columns.values]
+    return yearly_agg
+
+
+def analyze_temporal_trends(df: pd.DataFrame, yearly_df: Optional[pd.DataFrame] = None) -> Dict:
     """
     Analiza trendow czasowych.
 
+    Args:
+        yearly_df: Wynik compute_yearly_aggregates() (liczony, jesli brak)
+
     Returns:
         Dict z analiza trendow
     """
@@ -134,63 +169,70 @@ def analyze_temporal_trends(df: pd.DataFrame) -> Dict:
 
     trends = {}
 
-    # Globalne trendy (srednie roczne)
-    yearly_agg = df.groupby("year").agg({
-        "co2": ["sum", "mean"],
-        "co2_per_capita": "mean",
-        "gdp": "sum"
-    }).round(2)
-
-    # Splaszcz nazwy kolumn
-    yearly_agg.columns = ["_".join(col).strip() for col in yearly_agg.columns.values]
-    trends["yearly_global"] = yearly_agg.reset_index()
+    # Globalne trendy (srednie roczne) - liczba krajow w tej samej agregacji,
+    # zeby nie filtrowac ponownie calego zbioru dla 2000 i 2020
+    if yearly_df is None:
+        yearly_df = compute_yearly_aggregates(df)
 
-    # Zmiana miedzy 2000 a 2020
-    if 2000 in df["year"].values and 2020 in df["year"].values:
-        df_2000 = df[df["year"] == 2000]
-        df_2020 = df[df["year"] == 2020]
+    yearly_agg = yearly_df.drop(columns="country_nunique")
+    countries_per_year = yearly_df["country_nunique"]
+    trends["yearly_global"] = yearly_agg.round(2).reset_index()
 
+    # Zmiana miedzy 2000 a 2020 (odczyt z agregacji rocznej)
+    if 2000 in yearly_agg.index and 2020 in yearly_agg.index:
         trends["change_2000_2020"] = {
-            "co2_total_2000": df_2000["co2"].sum() if "co2" in df.columns else None,
-            "co2_total_2020": df_2020["co2"].sum() if "co2" in df.columns else None,
-            "countries_2000": df_2000["country"].nunique(),
-            "countries_2020": df_2020["country"].nunique()
+            "co2_total_2000": yearly_agg.at[2000, "co2_sum"],
+            "co2_total_2020": yearly_agg.at[2020, "co2_sum"],
+            "countries_2000": countries_per_year.at[2000],
+            "countries_2020": countries_per_year.at[2020]
         }
 
     return trends
 
 
+def _has_regions(df: pd.DataFrame) -> bool:
+    """
+    Czy kolumna region istnieje i ma choc jedna wartosc. Dla kategorii
+    sprawdzane sa kody int (-1 = brak) zamiast budowy maski isna().
+    """
+    if "region" not in df.columns:
+        return False
+    region = df["region"]
+    if isinstance(region.dtype, pd.CategoricalDtype):
+        return bool((region.cat.codes.to_numpy() != -1).any())
+    return bool(region.notna().to_numpy().any())
+
+
 def analyze_by_region(df: pd.DataFrame) -> pd.DataFrame:
     """
     Analiza statystyk wedlug regionow.
 
+    Wymaga kolumny region (dodawanej raz w run_step_04).
+
     Returns:
-        DataFrame z analiza regionalna
+        DataFrame z analiza regionalna (pusty, jesli brak regionow)
     """
-    # Dodaj kolumne region jesli nie istnieje
-    if "region" not in df.columns:
-        df = add_region_column(df, country_col="country", iso_col="iso_code")
-
-    if "region" not in df.columns or df["region"].isna().all():
+    if not _has_regions(df):
         return pd.DataFrame()
 
-    # Agregacja wedlug regionu
-    region_stats = df.groupby("region").agg({
-        "country": "nunique",
-        "co2": ["sum", "mean"],
-        "co2_per_capita": "mean",
-        "gdp": "sum",
-        "population": "sum"
-    }).round(2)
-
-    region_stats.columns = ["countries", "co2_total", "co2_mean", "co2_per_capita_mean",
-                           "gdp_total", "population_total"]
-    region_stats = region_stats.reset_index()
+    # Agregacja wedlug regionu - nazwane agregacje daja od razu plaskie kolumny
+    region_stats = df.groupby("region", observed=True).agg(
+        countries=("country", "nunique"),
+        co2_total=("co2", "sum"),
+        co2_mean=("co2", "mean"),
+        co2_per_capita_mean=("co2_per_capita", "mean"),
+        gdp_total=("gdp", "sum"),
+        population_total=("population", "sum")
+    ).round(2).reset_index()
 
     return region_stats
 
 
-def create_distribution_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
+def create_distribution_plots(
+    df: pd.DataFrame,
+    figures_dir: str,
+    executor: Optional[Executor] = None
+) -> List[str]:
     """
     Tworzenie wykresow rozkladow.
 
@@ -198,30 +240,27 @@ def create_distribution_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
         Lista sciezek do zapisanych wykresow
     """
     os.makedirs(figures_dir, exist_ok=True)
-    saved_plots = []
 
     key_vars = ["co2_per_capita", "gdp", "co2", "population"]
 
+    jobs = []
     for var in key_vars:
         if var in df.columns:
-            try:
-                fig = plot_histogram(df, var, title=f"Rozklad zmiennej {var}")
-                path = save_figure(fig, f"hist_{var}", figures_dir=figures_dir)
-                saved_plots.append(path)
-            except Exception as e:
-                print(f"    Blad tworzenia histogramu dla {var}: {e}")
-
-            try:
-                fig = plot_boxplot(df, var, title=f"Boxplot zmiennej {var}")
-                path = save_figure(fig, f"box_{var}", figures_dir=figures_dir)
-                saved_plots.append(path)
-            except Exception as e:
-                print(f"    Blad tworzenia boxplotu dla {var}: {e}")
+            data = df[[var]]
+            jobs.append(("plot_histogram", data, (var,), {"title": f"Rozklad zmiennej {var}"},
+                         f"hist_{var}", f"Blad tworzenia histogramu dla {var}"))
+            jobs.append(("plot_boxplot", data, (var,), {"title": f"Boxplot zmiennej {var}"},
+                         f"box_{var}", f"Blad tworzenia boxplotu dla {var}"))
 
-    return saved_plots
+    return render_plots(jobs, figures_dir, executor)
 
 
-def create_correlation_plot(df: pd.DataFrame, columns: List[str], figures_dir: str) -> Optional[str]:
+def create_correlation_plot(
+    df: pd.DataFrame,
+    columns: List[str],
+    figures_dir: str,
+    executor: Optional[Executor] = None
+) -> Optional[str]:
     """
     Tworzenie wykresu macierzy korelacji.
 
@@ -234,16 +273,19 @@ def create_correlation_plot(df: pd.DataFrame, columns: List[str], figures_dir: s
     if len(existing_cols) < 2:
         return None
 
-    try:
-        fig = plot_correlation_heatmap(df, existing_cols, title="Macierz korelacji kluczowych zmiennych")
-        path = save_figure(fig, "correlation_heatmap", figures_dir=figures_dir)
-        return path
-    except Exception as e:
-        print(f"    Blad tworzenia heatmapy korelacji: {e}")
-        return None
+    saved_plots = render_plots([
+        ("plot_correlation_heatmap", df[existing_cols], (existing_cols,),
+         {"title": "Macierz korelacji kluczowych zmiennych"},
+         "correlation_heatmap", "Blad tworzenia heatmapy korelacji")
+    ], figures_dir, executor)
+    return saved_plots[0] if saved_plots else None
 
 
-def create_scatter_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
+def create_scatter_plots(
+    df: pd.DataFrame,
+    figures_dir: str,
+    executor: Optional[Executor] = None
+) -> List[str]:
     """
     Tworzenie wykresow rozrzutu.
 
@@ -251,7 +293,6 @@ def create_scatter_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
         Lista sciezek do zapisanych wykresow
     """
     os.makedirs(figures_dir, exist_ok=True)
-    saved_plots = []
 
     scatter_pairs = [
         ("gdp", "co2", "PKB vs Emisje CO2"),
@@ -259,61 +300,52 @@ def create_scatter_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
         ("population", "co2", "Populacja vs Emisje CO2")
     ]
 
+    jobs = []
     for x, y, title in scatter_pairs:
         if x in df.columns and y in df.columns:
-            try:
-                fig = plot_scatter(df, x, y, title=title, add_regression=True)
-                path = save_figure(fig, f"scatter_{x}_{y}", figures_dir=figures_dir)
-                saved_plots.append(path)
-            except Exception as e:
-                print(f"    Blad tworzenia scatterplotu {x} vs {y}: {e}")
+            jobs.append(("plot_scatter", df[[x, y]], (x, y), {"title": title, "add_regression": True},
+                         f"scatter_{x}_{y}", f"Blad tworzenia scatterplotu {x} vs {y}"))
 
-    return saved_plots
+    return render_plots(jobs, figures_dir, executor)
 
 
-def create_trend_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
+def create_trend_plots(
+    df: pd.DataFrame,
+    figures_dir: str,
+    yearly_df: Optional[pd.DataFrame] = None,
+    executor: Optional[Executor] = None
+) -> List[str]:
     """
     Tworzenie wykresow trendow czasowych.
 
+    Args:
+        yearly_df: Wynik compute_yearly_aggregates() (liczony, jesli brak)
+
     Returns:
         Lista sciezek do zapisanych wykresow
     """
     os.makedirs(figures_dir, exist_ok=True)
-    saved_plots = []
 
     if "year" not in df.columns:
-        return saved_plots
+        return []
 
     # Globalne trendy
-    yearly = df.groupby("year").agg({
-        "co2": "sum",
-        "co2_per_capita": "mean"
-    }).reset_index()
-
-    try:
-        fig = plot_time_series(yearly, "year", "co2", title="Globalne emisje CO2 w czasie")
-        path = save_figure(fig, "trend_co2_global", figures_dir=figures_dir)
-        saved_plots.append(path)
-    except Exception as e:
-        print(f"    Blad tworzenia trendu CO2: {e}")
-
-    # Trendy wedlug regionu
-    if "region" not in df.columns:
-        df = add_region_column(df, country_col="country", iso_col="iso_code")
+    if yearly_df is None:
+        yearly_df = compute_yearly_aggregates(df)
+    yearly = yearly_df[["co2_sum"]].rename(columns={"co2_sum": "co2"}).reset_index()
+
+    jobs = [
+        ("plot_time_series", yearly, ("year", "co2"), {"title": "Globalne emisje CO2 w czasie"},
+         "trend_co2_global", "Blad tworzenia trendu CO2")
+    ]
 
-    if "region" in df.columns and not df["region"].isna().all():
-        try:
-            fig = plot_trends_by_group(
-                df, "year", "co2", "region",
-                agg_func="sum",
-                title="Emisje CO2 wedlug regionu"
-            )
-            path = save_figure(fig, "trend_co2_by_region", figures_dir=figures_dir)
-            saved_plots.append(path)
-        except Exception as e:
-            print(f"    Blad tworzenia trendu CO2 by region: {e}")
+    # Trendy wedlug regionu (kolumna region dodawana raz w run_step_04)
+    if _has_regions(df):
+        jobs.append(("plot_trends_by_group", df[["year", "co2", "region"]], ("year", "co2", "region"),
+                     {"agg_func": "sum", "title": "Emisje CO2 wedlug regionu"},
+                     "trend_co2_by_region", "Blad tworzenia trendu CO2 by region"))
 
-    return saved_plots
+    return render_plots(jobs, figures_dir, executor)
 
 
 def generate_eda_report(
@@ -333,6 +365,15 @@ def generate_eda_report(
     """
     report = ReportBuilder(title="Eksploracyjna analiza danych (EDA)")
 
+    # Skalary podsumowania liczone raz na poczatku raportu
+    n_rows = len(df)
+    n_cols = len(df.columns)
+    n_countries = df["country"].nunique() if "country" in df.columns else None
+    if "year" in df.columns:
+        yr_min, yr_max = df["year"].min(), df["year"].max()
+    else:
+        yr_min = yr_max = None
+
     # ==========================================================================
     # 1. Wprowadzenie
     # ==========================================================================
@@ -344,10 +385,10 @@ def generate_eda_report(
     )
 
     report.add_key_value_table({
-        "Liczba obserwacji": f"{len(df):,}",
-        "Liczba zmiennych": len(df.columns),
-        "Liczba krajow": df["country"].nunique() if "country" in df.columns else "N/A",
-        "Zakres czasowy": f"{df['year'].min()}-{df['year'].max()}" if "year" in df.columns else "N/A"
+        "Liczba obserwacji": f"{n_rows:,}",
+        "Liczba zmiennych": n_cols,
+        "Liczba krajow": n_countries if n_countries is not None else "N/A",
+        "Zakres czasowy": f"{yr_min}-{yr_max}" if yr_min is not None else "N/A"
     })
 
     # ==========================================================================
@@ -371,7 +412,11 @@ def generate_eda_report(
     report.add_heading("Pelna tabela statystyk", level=3)
     report.add_collapsible(
         "Pokaz wszystkie zmienne",
-        desc_stats.to_markdown(index=False)
+        markdown_table(
+            list(desc_stats.columns),
+            desc_stats.itertuples(index=False, name=None),
+            float_format=4
+        )
     )
 
     # ==========================================================================
@@ -498,12 +543,19 @@ def generate_eda_report(
 
 
 def save_eda_outputs(desc_stats: pd.DataFrame, corr_matrix: pd.DataFrame):
-    """Zapisanie wynikow EDA do plikow CSV."""
+    """
+    Zapisanie wynikow EDA do plikow CSV (do wgladu) oraz Parquet (typowane
+    kolumny do dalszego wczytywania bez parsowania tekstu).
+    """
     os.makedirs(EDA_DIR, exist_ok=True)
 
     desc_stats.to_csv(os.path.join(EDA_DIR, "descriptive_stats.csv"), index=False)
     corr_matrix.to_csv(os.path.join(EDA_DIR, "correlation_matrix.csv"))
 
+    write_parquet(desc_stats, os.path.join(EDA_DIR, "descriptive_stats.parquet"), compression="zstd")
+    write_parquet(corr_matrix, os.path.join(EDA_DIR, "correlation_matrix.parquet"),
+                  compression="zstd", index=True)
+
 
 def run_step_04(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     """
@@ -520,42 +572,56 @@ def run_step_04(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print("\n  Dodawanie kolumny region...")
     df = add_region_column(df, country_col="country", iso_col="iso_code")
 
+    # Kolumny tekstowe jako kategorie (grupowanie po kodach int) - tylko w
+    # widoku do analiz tego kroku; zwracany DataFrame zostaje bez zmian, bo
+    # kolejne kroki grupuja po country bez observed=True
+    df_eda = df.copy(deep=False)
+    for col in ("region", "country", "iso_code"):
+        if col in df_eda.columns:
+            df_eda[col] = df_eda[col].astype("category")
+
     # 1. Statystyki opisowe
     print("\n  Obliczanie statystyk opisowych...")
-    desc_stats = compute_descriptive_stats(df)
+    desc_stats = compute_descriptive_stats(df_eda)
     print(f"    Przeanalizowano {len(desc_stats)} zmiennych")
 
     # 2. Analiza korelacji
     print("\n  Analiza korelacji...")
     key_cols = ["co2", "co2_per_capita", "gdp", "population",
                 "primary_energy_consumption", "coal_co2", "oil_co2", "gas_co2"]
-    corr_matrix, top_corr = compute_correlation_analysis(df, key_cols)
+    corr_matrix, top_corr = compute_correlation_analysis(df_eda, key_cols)
     print(f"    Top korelacji: {len(top_corr)}")
 
-    # 3. Trendy czasowe
+    # 3. Trendy czasowe (agregacja roczna wspolna z wykresami trendow)
     print("\n  Analiza trendow czasowych...")
-    trends = analyze_temporal_trends(df)
+    yearly_df = compute_yearly_aggregates(df_eda) if "year" in df_eda.columns else None
+    trends = analyze_temporal_trends(df_eda, yearly_df)
 
     # 4. Analiza regionalna
     print("\n  Analiza regionalna...")
-    region_stats = analyze_by_region(df)
+    region_stats = analyze_by_region(df_eda)
 
-    # 5. Tworzenie wykresow
+    # 5. Tworzenie wykresow (renderowanie w puli procesow - matplotlib nie
+    # zwalnia GIL, wiec watki nie przyspieszylyby rysowania); przy jednym
+    # rdzeniu roboczym bez puli - executor None oznacza rysowanie na miejscu
     print("\n  Tworzenie wykresow...")
     plot_paths = {}
 
-    print("    - Rozklady...")
-    plot_paths["distributions"] = create_distribution_plots(df, EDA_FIGURES_DIR)
+    workers = get_worker_cpu()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()
+    with pool as executor:
+        print("    - Rozklady...")
+        plot_paths["distributions"] = create_distribution_plots(df_eda, EDA_FIGURES_DIR, executor)
 
-    print("    - Korelacje...")
-    corr_plot = create_correlation_plot(df, key_cols, EDA_FIGURES_DIR)
-    plot_paths["correlation"] = [corr_plot] if corr_plot else []
+        print("    - Korelacje...")
+        corr_plot = create_correlation_plot(df_eda, key_cols, EDA_FIGURES_DIR, executor)
+        plot_paths["correlation"] = [corr_plot] if corr_plot else []
 
-    print("    - Scatter plots...")
-    plot_paths["scatter"] = create_scatter_plots(df, EDA_FIGURES_DIR)
+        print("    - Scatter plots...")
+        plot_paths["scatter"] = create_scatter_plots(df_eda, EDA_FIGURES_DIR, executor)
 
-    print("    - Trendy...")
-    plot_paths["trends"] = create_trend_plots(df, EDA_FIGURES_DIR)
+        print("    - Trendy...")
+        plot_paths["trends"] = create_trend_plots(df_eda, EDA_FIGURES_DIR, yearly_df, executor)
 
     # 6. Zapisanie wynikow
     print("\n  Zapisywanie wynikow...")
@@ -565,7 +631,7 @@ def run_step_04(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     # 7. Generowanie raportu
     print("\n  Generowanie raportu...")
     report_path = generate_eda_report(
-        df, desc_stats, corr_matrix, top_corr,
+        df_eda, desc_stats, corr_matrix, top_corr,
         trends, region_stats, plot_paths
     )
 
@@ -23,9 +23,10 @@ import os
 
 from constants import REPORT_DIR, OUT_DIR
 from utils.report import ReportBuilder
+from utils.fs import write_parquet_chunked
 from utils.df import (
     add_log_column, add_squared_column, add_pct_change,
-    add_diff, add_quantile_bins
+    add_diff, add_quantile_bins, group_shift, group_shift_index
 )
 from utils.country import add_region_column
 
@@ -33,24 +34,35 @@ from utils.country import add_region_column
 FEATURES_DIR = os.path.join(OUT_DIR, "features")
 
 
+def _nonzero_or_nan(s: pd.Series) -> np.ndarray:
+    """Kolumna jako float64 z zerami zamienionymi na NaN (bezpieczny mianownik)."""
+    arr = s.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    arr[arr == 0] = np.nan
+    return arr
+
+
 def add_log_transforms(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     """
     Dodanie transformacji logarytmicznych.
 
+    Kolumny dodawane w miejscu - kopie wejscia robi raz run_step_05.
+
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
+    col_set = set(df.columns)
 
     log_vars = ["co2_per_capita", "gdp", "population", "co2",
                 "primary_energy_consumption"]
 
     for var in log_vars:
-        if var in df.columns:
+        if var in col_set:
             new_col = f"{var}_log"
-            # Dodaj maly offset dla wartosci zerowych/ujemnych
-            df[new_col] = np.log1p(df[var].clip(lower=0))
+            # Dodaj maly offset dla wartosci zerowych/ujemnych; obciecie do 0
+            # i log1p w jednym buforze zamiast tymczasowej Series z clip()
+            out = np.maximum(df[var].to_numpy(dtype=np.float64, na_value=np.nan), 0.0)
+            df[new_col] = np.log1p(out, out=out)
             new_cols.append(new_col)
 
     return df, new_cols
@@ -60,25 +72,33 @@ def add_polynomial_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     """
     Dodanie cech wielomianowych (dla testu krzywej Kuznetsa).
 
+    Kolumny dodawane w miejscu - kopie wejscia robi raz run_step_05.
+
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
+    col_set = set(df.columns)
 
     # PKB per capita do kwadratu
-    if "gdp" in df.columns and "population" in df.columns:
+    if "gdp" in col_set and "population" in col_set:
         # Najpierw oblicz gdp_per_capita jesli nie istnieje
-        if "gdp_per_capita" not in df.columns:
-            df["gdp_per_capita"] = df["gdp"] / df["population"]
+        if "gdp_per_capita" not in col_set:
+            # Zerowa populacja -> NaN zamiast inf
+            gdp = df["gdp"].to_numpy(dtype=np.float64, na_value=np.nan)
+            df["gdp_per_capita"] = gdp / _nonzero_or_nan(df["population"])
             new_cols.append("gdp_per_capita")
+            col_set.add("gdp_per_capita")
 
-    if "gdp_per_capita" in df.columns:
-        df["gdp_per_capita_sq"] = df["gdp_per_capita"] ** 2
+    if "gdp_per_capita" in col_set:
+        # Kwadrat i szescian z jednego odczytu - szescian z bufora kwadratu
+        gpc = df["gdp_per_capita"].to_numpy(dtype=np.float64, na_value=np.nan)
+        sq = np.multiply(gpc, gpc)
+        df["gdp_per_capita_sq"] = sq
         new_cols.append("gdp_per_capita_sq")
 
         # Opcjonalnie: szescian dla lepszego dopasowania
-        df["gdp_per_capita_cu"] = df["gdp_per_capita"] ** 3
+        df["gdp_per_capita_cu"] = np.multiply(sq, gpc)
         new_cols.append("gdp_per_capita_cu")
 
     return df, new_cols
@@ -91,11 +111,18 @@ def add_change_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
 
-    # Sortuj po kraju i roku
+    # Sortuj po kraju i roku (sort_values zwraca nowy DataFrame - osobna
+    # kopia nie jest potrzebna)
     df = df.sort_values(["country", "year"])
+    col_set = set(df.columns)
+
+    # Kody krajow i indeks przesuniecia raz dla wszystkich zmiennych; roznica
+    # i zmiana procentowa z jednego przesuniecia (group_shift) zamiast osobnych
+    # groupby diff()/pct_change()
+    codes, _ = pd.factorize(df["country"], sort=False)
+    shift_index = group_shift_index(codes, 1)
 
     change_vars = {
         "co2": "co2_change",
@@ -104,20 +131,24 @@ def add_change_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     }
 
     for var, new_col in change_vars.items():
-        if var in df.columns:
-            df[new_col] = df.groupby("country")[var].diff()
+        if var in col_set:
+            values = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+            shifted = group_shift(values, codes, index=shift_index)
+            df[new_col] = values - shifted
             new_cols.append(new_col)
 
             # Procentowa zmiana
             pct_col = f"{var}_pct_change"
-            df[pct_col] = df.groupby("country")[var].pct_change() * 100
+            with np.errstate(divide="ignore", invalid="ignore"):
+                df[pct_col] = (values / shifted - 1.0) * 100.0
             new_cols.append(pct_col)
 
     # Zmiana udzialu OZE
-    oze_cols = [c for c in df.columns if "renewable" in c.lower() and "share" in c.lower()]
-    if oze_cols:
-        oze_col = oze_cols[0]
-        df["renewable_share_change"] = df.groupby("country")[oze_col].diff()
+    # Pierwsza (w kolejnosci kolumn) kolumna udzialu OZE - bez budowy pelnej listy
+    oze_col = next((c for c in df.columns if "renewable" in c.lower() and "share" in c.lower()), None)
+    if oze_col is not None:
+        values = df[oze_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        df["renewable_share_change"] = values - group_shift(values, codes, index=shift_index)
         new_cols.append("renewable_share_change")
 
     return df, new_cols
@@ -127,22 +158,35 @@ def add_categorical_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]
     """
     Dodanie cech kategorycznych.
 
+    Kolumny dodawane w miejscu - kopie wejscia robi raz run_step_05.
+
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
 
     # Poziom rozwoju (kwartyle PKB per capita)
     if "gdp_per_capita" in df.columns:
-        # Oblicz kwartyle na podstawie sredniej per capita dla kazdego kraju
-        country_gdp = df.groupby("country")["gdp_per_capita"].mean()
+        # Oblicz kwartyle na podstawie sredniej per capita dla kazdego kraju -
+        # jedna faktoryzacja krajow sluzy i do sredniej (bincount), i do
+        # przypisania poziomu wierszom; brak kraju -> kod -1
+        country_codes, countries = pd.factorize(df["country"], sort=True)
+        gpc = df["gdp_per_capita"].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = (country_codes >= 0) & ~np.isnan(gpc)
+        sums = np.bincount(country_codes[valid], weights=gpc[valid], minlength=len(countries))
+        counts = np.bincount(country_codes[valid], minlength=len(countries))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            country_gdp = pd.Series(sums / counts, index=countries)
 
         labels = ["Low", "Medium", "High", "Very High"]
         country_level = pd.qcut(country_gdp, q=4, labels=labels, duplicates="drop")
-        country_level_map = country_level.to_dict()
 
-        df["development_level"] = df["country"].map(country_level_map)
+        # Poziom kraju przez kody kategorii (indeksowanie numpy) zamiast map()
+        # ze slownikiem - wynik jako kategoria, kraje bez poziomu -> NaN
+        level_codes = country_level.cat.codes.to_numpy()
+        row_codes = np.where(country_codes >= 0, level_codes[country_codes], -1)
+
+        df["development_level"] = pd.Categorical.from_codes(row_codes, dtype=country_level.dtype)
         new_cols.append("development_level")
 
     # Dodaj region jesli nie istnieje
@@ -158,35 +202,47 @@ def add_ratio_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     """
     Dodanie cech stosunkowych.
 
+    Kolumny dodawane w miejscu - kopie wejscia robi raz run_step_05.
+
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
+    col_set = set(df.columns)
+
+    # Mianowniki liczone raz na kolumne zamiast replace(0, NaN) przy kazdym ilorazie
+    co2_safe = _nonzero_or_nan(df["co2"]) if "co2" in col_set else None
+    gdp_safe = _nonzero_or_nan(df["gdp"]) if "gdp" in col_set else None
 
     # Udzial paliw kopalnych w emisjach CO2
     fossil_cols = ["coal_co2", "oil_co2", "gas_co2"]
-    if all(c in df.columns for c in fossil_cols) and "co2" in df.columns:
-        df["fossil_co2"] = df["coal_co2"].fillna(0) + df["oil_co2"].fillna(0) + df["gas_co2"].fillna(0)
-        df["fossil_share"] = df["fossil_co2"] / df["co2"].replace(0, np.nan)
+    if col_set.issuperset(fossil_cols) and co2_safe is not None:
+        # Suma paliw w jednym buforze (braki liczone jako 0, jak fillna(0))
+        fuel_arrs = {col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in fossil_cols}
+        fossil_co2 = np.zeros(len(df))
+        for arr in fuel_arrs.values():
+            np.add(fossil_co2, arr, out=fossil_co2, where=~np.isnan(arr))
+
+        df["fossil_co2"] = fossil_co2
+        df["fossil_share"] = fossil_co2 / co2_safe
         new_cols.extend(["fossil_co2", "fossil_share"])
 
         # Udzial poszczegolnych paliw
         for fuel in ["coal", "oil", "gas"]:
             col = f"{fuel}_co2"
-            if col in df.columns:
-                share_col = f"{fuel}_share"
-                df[share_col] = df[col] / df["co2"].replace(0, np.nan)
-                new_cols.append(share_col)
+            share_col = f"{fuel}_share"
+            df[share_col] = fuel_arrs[col] / co2_safe
+            new_cols.append(share_col)
 
     # Intensywnosc emisji (CO2 per unit GDP)
-    if "co2" in df.columns and "gdp" in df.columns:
-        df["emission_intensity"] = df["co2"] / df["gdp"].replace(0, np.nan)
+    if "co2" in col_set and gdp_safe is not None:
+        df["emission_intensity"] = df["co2"].to_numpy(dtype=np.float64, na_value=np.nan) / gdp_safe
         new_cols.append("emission_intensity")
 
     # Intensywnosc energetyczna
-    if "primary_energy_consumption" in df.columns and "gdp" in df.columns:
-        df["energy_intensity"] = df["primary_energy_consumption"] / df["gdp"].replace(0, np.nan)
+    if "primary_energy_consumption" in col_set and gdp_safe is not None:
+        energy = df["primary_energy_consumption"].to_numpy(dtype=np.float64, na_value=np.nan)
+        df["energy_intensity"] = energy / gdp_safe
         new_cols.append("energy_intensity")
 
     return df, new_cols
@@ -199,25 +255,32 @@ def add_lag_features(df: pd.DataFrame, lags: List[int] = [1, 5]) -> Tuple[pd.Dat
     Returns:
         Tuple (DataFrame z nowymi kolumnami, lista dodanych kolumn)
     """
-    df = df.copy()
     new_cols = []
 
     df = df.sort_values(["country", "year"])
 
-    lag_vars = ["co2_per_capita", "gdp"]
+    lag_vars = [var for var in ["co2_per_capita", "gdp"] if var in df.columns]
+    if not lag_vars:
+        return df, new_cols
+
+    # Po sortowaniu kraje tworza ciagle bloki - przesuniecie w numpy z maska
+    # granic grup (group_shift) zamiast groupby().shift() dla kazdej pary
+    # (var, lag); indeks przesuniecia liczony raz na lag
+    codes, _ = pd.factorize(df["country"], sort=False)
+    shift_index = {lag: group_shift_index(codes, lag) for lag in lags}
 
     for var in lag_vars:
-        if var in df.columns:
-            for lag in lags:
-                new_col = f"{var}_lag{lag}"
-                df[new_col] = df.groupby("country")[var].shift(lag)
-                new_cols.append(new_col)
+        values = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+        for lag in lags:
+            new_col = f"{var}_lag{lag}"
+            df[new_col] = group_shift(values, codes, lag, index=shift_index[lag])
+            new_cols.append(new_col)
 
     return df, new_cols
 
 
 def generate_feature_report(
-    df_before: pd.DataFrame,
+    cols_before: List[str],
     df_after: pd.DataFrame,
     features_added: Dict[str, List[str]]
 ) -> str:
@@ -241,9 +304,9 @@ def generate_feature_report(
     )
 
     report.add_key_value_table({
-        "Kolumny przed": len(df_before.columns),
+        "Kolumny przed": len(cols_before),
         "Kolumny po": len(df_after.columns),
-        "Nowe kolumny": len(df_after.columns) - len(df_before.columns)
+        "Nowe kolumny": len(df_after.columns) - len(cols_before)
     })
 
     # ==========================================================================
@@ -328,7 +391,7 @@ def generate_feature_report(
     # Rozklad poziomow rozwoju
     if "development_level" in df_after.columns:
         report.add_heading("Rozklad poziomu rozwoju", level=3)
-        dev_counts = df_after.groupby("development_level")["country"].nunique()
+        dev_counts = df_after.groupby("development_level", observed=True)["country"].nunique()
         report.add_key_value_table(dev_counts.to_dict())
 
     # ==========================================================================
@@ -398,10 +461,10 @@ def generate_feature_report(
 
 
 def save_features_data(df: pd.DataFrame) -> str:
-    """Zapisanie danych z nowymi cechami."""
-    os.makedirs(FEATURES_DIR, exist_ok=True)
+    """Zapisanie danych z nowymi cechami (katalog tworzy run_step_05)."""
     path = os.path.join(FEATURES_DIR, "panel_with_features.parquet")
-    df.to_parquet(path, index=False)
+    # Zapis grupami wierszy - w pamieci naraz tylko jeden fragment jako Arrow
+    write_parquet_chunked(df, path, chunk_size=131_072, compression="zstd", compression_level=3)
     return path
 
 
@@ -416,7 +479,12 @@ def run_step_05(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print("Krok 5: Przeksztalcanie zmiennych (Feature Engineering)")
     print("=" * 60)
 
-    df_before = df.copy()
+    os.makedirs(FEATURES_DIR, exist_ok=True)
+
+    # Jedna kopia na caly krok - funkcje add_* dodaja kolumny w miejscu;
+    # do raportu potrzebne sa tylko nazwy kolumn "przed"
+    cols_before = list(df.columns)
+    df = df.copy()
     features_added = {}
 
     # 1. Transformacje logarytmiczne
@@ -455,10 +523,19 @@ def run_step_05(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     features_added["lag"] = new_cols
     print(f"    Dodano {len(new_cols)} zmiennych")
 
+    # Nowe cechy zmiennoprzecinkowe jako float32 (polowa pamieci i rozmiaru
+    # pliku); surowe zmienne i lagi (kopie surowych wartosci) zostaja float64
+    new_float_cols = [
+        c for group, cols in features_added.items() if group != "lag"
+        for c in cols if df[c].dtype == np.float64
+    ]
+    if new_float_cols:
+        df[new_float_cols] = df[new_float_cols].astype(np.float32)
+
     # Podsumowanie
     total_new = sum(len(v) for v in features_added.values())
     print(f"\n  Lacznie dodano {total_new} nowych zmiennych")
-    print(f"  Kolumny: {len(df_before.columns)} -> {len(df.columns)}")
+    print(f"  Kolumny: {len(cols_before)} -> {len(df.columns)}")
 
     # Zapisanie danych
     print("\n  Zapisywanie danych...")
@@ -467,7 +544,7 @@ def run_step_05(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
 
     # Generowanie raportu
     print("\n  Generowanie raportu...")
-    report_path = generate_feature_report(df_before, df, features_added)
+    report_path = generate_feature_report(cols_before, df, features_added)
 
     print(f"\n Raport zapisany: {report_path}")
 
@@ -11,6 +11,7 @@ Funkcje:
 Output:
 - out/outliers/outliers_summary.csv
 - out/outliers/extreme_cases.csv
+- out/outliers/outliers_summary.parquet, out/outliers/extreme_cases.parquet
 - report/06_outliers.md
 - report/figures/outliers/*.png
 """
@@ -19,10 +20,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from constants import REPORT_DIR, OUT_DIR
 from utils.report import ReportBuilder
-from utils.df import detect_outliers_iqr, detect_outliers_zscore, get_outlier_bounds_iqr
+from utils.fs import write_parquet
+from utils.df import detect_outliers_iqr
 from utils.plotting import (
     plot_boxplot_with_outliers, plot_outliers_scatter,
     save_figure, FIGURES_DIR
@@ -33,6 +36,41 @@ OUTLIERS_DIR = os.path.join(OUT_DIR, "outliers")
 OUTLIERS_FIGURES_DIR = os.path.join(FIGURES_DIR, "outliers")
 
 
+def _column_outlier_stats(
+    values: np.ndarray, k: float = 1.5, threshold: float = 3.0
+) -> Optional[Dict]:
+    """
+    Granice IQR oraz liczba outlierow IQR i Z-score z jednego bufora bez NaN
+    (te same wyniki co detect_outliers_iqr / get_outlier_bounds_iqr /
+    detect_outliers_zscore, bez trzech osobnych przebiegow po kolumnie).
+
+    Returns:
+        Dict ze statystykami lub None, jesli kolumna nie ma wartosci
+    """
+    a = values[~np.isnan(values)]
+    if a.size == 0:
+        return None
+
+    q1, q3 = np.quantile(a, [0.25, 0.75])
+    iqr = q3 - q1
+    lower, upper = q1 - k * iqr, q3 + k * iqr
+
+    # Odchylenie standardowe z ddof=1, jak Series.std() (NaN dla 1 wartosci)
+    std = a.std(ddof=1) if a.size > 1 else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = np.abs((a - a.mean()) / std)
+
+    return {
+        "n_total": a.size,
+        "n_outliers_iqr": np.count_nonzero((a < lower) | (a > upper)),
+        "n_outliers_zscore": np.count_nonzero(z_scores > threshold),
+        "lower_iqr": lower,
+        "upper_iqr": upper,
+        "min": a.min(),
+        "max": a.max()
+    }
+
+
 def detect_outliers_multiple_methods(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
     """
     Wykrywanie outlierow wieloma metodami.
@@ -41,38 +79,68 @@ def detect_outliers_multiple_methods(df: pd.DataFrame, columns: List[str]) -> pd
         DataFrame z informacja o outlierach dla kazdej zmiennej
     """
     results = []
-
-    for col in columns:
-        if col not in df.columns:
+    present = [col for col in columns if col in df.columns]
+    arrays = [df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in present]
+
+    # Kolumny niezalezne - watki wystarcza, bo sortowanie/redukcje numpy
+    # zwalniaja GIL; map() zachowuje kolejnosc kolumn
+    if len(arrays) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(arrays), os.cpu_count() or 1)) as executor:
+            all_stats = list(executor.map(_column_outlier_stats, arrays))
+    else:
+        all_stats = [_column_outlier_stats(arr) for arr in arrays]
+
+    for col, stats in zip(present, all_stats):
+        if stats is None:
             continue
 
-        s = df[col].dropna()
-        if len(s) == 0:
-            continue
-
-        # IQR method
-        outliers_iqr = detect_outliers_iqr(df, col)
-        lower_iqr, upper_iqr = get_outlier_bounds_iqr(df, col)
-
-        # Z-score method
-        outliers_zscore = detect_outliers_zscore(df, col, threshold=3.0)
-
         results.append({
             "variable": col,
-            "n_total": len(s),
-            "n_outliers_iqr": outliers_iqr.sum(),
-            "pct_outliers_iqr": round(outliers_iqr.sum() / len(df) * 100, 2),
-            "n_outliers_zscore": outliers_zscore.sum(),
-            "pct_outliers_zscore": round(outliers_zscore.sum() / len(df) * 100, 2),
-            "lower_bound_iqr": round(lower_iqr, 4),
-            "upper_bound_iqr": round(upper_iqr, 4),
-            "min": round(s.min(), 4),
-            "max": round(s.max(), 4)
+            "n_total": stats["n_total"],
+            "n_outliers_iqr": stats["n_outliers_iqr"],
+            "pct_outliers_iqr": round(stats["n_outliers_iqr"] / len(df) * 100, 2),
+            "n_outliers_zscore": stats["n_outliers_zscore"],
+            "pct_outliers_zscore": round(stats["n_outliers_zscore"] / len(df) * 100, 2),
+            "lower_bound_iqr": round(stats["lower_iqr"], 4),
+            "upper_bound_iqr": round(stats["upper_iqr"], 4),
+            "min": round(stats["min"], 4),
+            "max": round(stats["max"], 4)
         })
 
     return pd.DataFrame(results)
 
 
+def _top_n_positions(
+    values: np.ndarray, n: int, largest: bool, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Pozycje n najwiekszych/najmniejszych wartosci w kolejnosci jak
+    nlargest/nsmallest (remisy wg pozycji, braki NaN na koncu, jesli brakuje
+    wartosci). Selekcja np.partition w O(N), sortowanie tylko n kandydatow.
+
+    Args:
+        mask: Wiersze brane pod uwage (domyslnie wszystkie)
+    """
+    rows = np.arange(len(values)) if mask is None else np.flatnonzero(mask)
+    if n <= 0:
+        return rows[:0]
+
+    is_nan = np.isnan(values[rows])
+    positions = rows[~is_nan]
+    keys = -values[positions] if largest else values[positions]
+
+    if n < len(keys):
+        # Wszystkie wartosci ostrzejsze od progu + pierwsze (wg pozycji) remisy
+        kth = np.partition(keys, n - 1)[n - 1]
+        strict = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[:n - len(strict)]
+        chosen = np.concatenate([strict, ties])
+        positions, keys = positions[chosen], keys[chosen]
+
+    top = positions[np.lexsort((positions, keys))]
+    return np.concatenate([top, rows[is_nan][:n - len(top)]])
+
+
 def identify_extreme_cases(df: pd.DataFrame, var: str, n_top: int = 10) -> pd.DataFrame:
     """
     Identyfikacja ekstremalnych przypadkow dla danej zmiennej.
@@ -83,16 +151,19 @@ def identify_extreme_cases(df: pd.DataFrame, var: str, n_top: int = 10) -> pd.Da
     if var not in df.columns:
         return pd.DataFrame()
 
+    cols = ["country", "year", var]
+    values = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+
     # Top high values
-    top_high = df.nlargest(n_top, var)[["country", "year", var]].copy()
+    top_high = df.iloc[_top_n_positions(values, n_top, largest=True)][cols].copy()
     top_high["type"] = "high"
 
     # Top low values (excluding zeros/negatives for some vars)
-    df_positive = df[df[var] > 0] if var in ["co2_per_capita", "gdp"] else df
-    top_low = df_positive.nsmallest(n_top, var)[["country", "year", var]].copy()
+    low_mask = values > 0 if var in ["co2_per_capita", "gdp"] else None
+    top_low = df.iloc[_top_n_positions(values, n_top, largest=False, mask=low_mask)][cols].copy()
     top_low["type"] = "low"
 
-    return pd.concat([top_high, top_low]).reset_index(drop=True)
+    return pd.concat([top_high, top_low], ignore_index=True)
 
 
 def analyze_known_outliers(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
@@ -132,7 +203,6 @@ def create_outlier_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
     Returns:
         Lista sciezek do zapisanych wykresow
     """
-    os.makedirs(figures_dir, exist_ok=True)
     saved_plots = []
 
     key_vars = ["co2_per_capita", "co2", "gdp"]
@@ -288,20 +358,21 @@ def generate_outliers_report(
 
 
 def save_outliers_outputs(outliers_summary: pd.DataFrame, extreme_cases: Dict[str, pd.DataFrame]):
-    """Zapisanie wynikow analizy outlierow."""
-    os.makedirs(OUTLIERS_DIR, exist_ok=True)
-
+    """
+    Zapisanie wynikow analizy outlierow do CSV (do wgladu) oraz Parquet
+    (typowane kolumny do dalszego wczytywania). Katalog tworzy run_step_06.
+    """
     outliers_summary.to_csv(os.path.join(OUTLIERS_DIR, "outliers_summary.csv"), index=False)
+    write_parquet(outliers_summary, os.path.join(OUTLIERS_DIR, "outliers_summary.parquet"),
+                  compression="zstd")
 
     # Polacz ekstremalne przypadki
-    all_extreme = []
-    for var, df in extreme_cases.items():
-        df_copy = df.copy()
-        df_copy["source_variable"] = var
-        all_extreme.append(df_copy)
+    all_extreme = [df.assign(source_variable=var) for var, df in extreme_cases.items()]
 
     if all_extreme:
-        pd.concat(all_extreme).to_csv(os.path.join(OUTLIERS_DIR, "extreme_cases.csv"), index=False)
+        extreme = pd.concat(all_extreme, ignore_index=True)
+        extreme.to_csv(os.path.join(OUTLIERS_DIR, "extreme_cases.csv"), index=False)
+        write_parquet(extreme, os.path.join(OUTLIERS_DIR, "extreme_cases.parquet"), compression="zstd")
 
 
 def run_step_06(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
@@ -315,6 +386,10 @@ def run_step_06(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print("Krok 6: Analiza danych nietypowych (outliers)")
     print("=" * 60)
 
+    # Katalogi wyjsciowe raz na krok zamiast w kazdej funkcji zapisu
+    os.makedirs(OUTLIERS_DIR, exist_ok=True)
+    os.makedirs(OUTLIERS_FIGURES_DIR, exist_ok=True)
+
     # 1. Wykrywanie outlierow
     print("\n  Wykrywanie outlierow...")
     key_vars = ["co2", "co2_per_capita", "gdp", "population",
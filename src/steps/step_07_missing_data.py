@@ -20,22 +20,23 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 
 from constants import REPORT_DIR, OUT_DIR
-from utils.report import ReportBuilder
+from utils.report import ReportBuilder, report_digest, cached_report
+from utils.fs import write_parquet
+import utils.df
 from utils.df import (
-    df_missing_summary, impute_interpolate, impute_by_group,
-    impute_forward_backward
-)
-from utils.plotting import (
-    plot_missing_heatmap, plot_missing_bar, plot_missing_by_year,
-    save_figure, FIGURES_DIR
+    df_missing_summary, total_nan, interpolate_fill_grouped
 )
+from utils.plot_jobs import render_plots, PLOTTING_SOURCE
+from utils.processing import get_worker_cpu
 
 
 MISSING_DIR = os.path.join(OUT_DIR, "missing")
 IMPUTED_DIR = os.path.join(OUT_DIR, "imputed")
-MISSING_FIGURES_DIR = os.path.join(FIGURES_DIR, "missing")
+# Ta sama sciezka co utils.plotting.FIGURES_DIR / "missing" - bez importu matplotlib
+MISSING_FIGURES_DIR = os.path.join(REPORT_DIR, "figures", "missing")
 
 
 def compute_missing_stats(df: pd.DataFrame) -> pd.DataFrame:
@@ -48,6 +49,33 @@ def compute_missing_stats(df: pd.DataFrame) -> pd.DataFrame:
     return df_missing_summary(df)
 
 
+def _missing_by_group(df: pd.DataFrame, key: str, size_col: str) -> pd.DataFrame:
+    """
+    Liczba brakow i odsetek brakow w grupach kolumny `key`.
+
+    Jedna maska brakow zliczana wierszami, potem sumy w grupach przez
+    bincount na kodach grup - bez apply z lambda wywolywana dla kazdej grupy.
+    """
+    # Grupy posortowane jak w groupby; wiersze bez klucza -> kod -1 (pomijane)
+    codes, groups = pd.factorize(df[key], sort=True)
+    row_missing = df.drop(columns=key).isna().to_numpy().sum(axis=1)
+
+    valid = codes >= 0
+    total_missing = np.bincount(codes[valid], weights=row_missing[valid], minlength=len(groups))
+    sizes = np.bincount(codes[valid], minlength=len(groups))
+
+    result = pd.DataFrame({
+        key: groups,
+        "total_missing": total_missing.astype(np.int64),
+        size_col: sizes.astype(np.int64),
+    })
+
+    # Procent brakow (minus kolumna grupujaca)
+    n_cols = len(df.columns) - 1
+    result["missing_pct"] = round(result["total_missing"] / (n_cols * result[size_col]) * 100, 2)
+    return result
+
+
 def analyze_missing_by_country(df: pd.DataFrame) -> pd.DataFrame:
     """
     Analiza brakow wedlug krajow.
@@ -58,24 +86,7 @@ def analyze_missing_by_country(df: pd.DataFrame) -> pd.DataFrame:
     if "country" not in df.columns:
         return pd.DataFrame()
 
-    country_missing = df.groupby("country").apply(
-        lambda x: x.isna().sum().sum()
-    ).reset_index()
-    country_missing.columns = ["country", "total_missing"]
-
-    # Dodaj procent brakow
-    n_cols = len(df.columns) - 1  # minus country
-    n_years = df.groupby("country").size()
-    max_possible = n_cols * n_years
-
-    country_missing = country_missing.merge(
-        n_years.reset_index().rename(columns={0: "n_years"}),
-        on="country"
-    )
-    country_missing["missing_pct"] = round(
-        country_missing["total_missing"] / (n_cols * country_missing["n_years"]) * 100, 2
-    )
-
+    country_missing = _missing_by_group(df, "country", "n_years")
     return country_missing.sort_values("missing_pct", ascending=False)
 
 
@@ -89,22 +100,7 @@ def analyze_missing_by_year(df: pd.DataFrame) -> pd.DataFrame:
     if "year" not in df.columns:
         return pd.DataFrame()
 
-    year_missing = df.groupby("year").apply(
-        lambda x: x.isna().sum().sum()
-    ).reset_index()
-    year_missing.columns = ["year", "total_missing"]
-
-    n_cols = len(df.columns) - 1
-    n_countries = df.groupby("year").size()
-
-    year_missing = year_missing.merge(
-        n_countries.reset_index().rename(columns={0: "n_countries"}),
-        on="year"
-    )
-    year_missing["missing_pct"] = round(
-        year_missing["total_missing"] / (n_cols * year_missing["n_countries"]) * 100, 2
-    )
-
+    year_missing = _missing_by_group(df, "year", "n_countries")
     return year_missing.sort_values("year")
 
 
@@ -141,91 +137,139 @@ def impute_data(df: pd.DataFrame, columns_to_impute: List[str]) -> Tuple[pd.Data
     Returns:
         Tuple (DataFrame z imputacja, statystyki imputacji)
     """
-    df = df.copy()
+    columns = [c for c in columns_to_impute if c in df.columns]
     imputation_stats = {}
-
-    for col in columns_to_impute:
-        if col not in df.columns:
-            continue
-
-        missing_before = df[col].isna().sum()
-
-        # Krok 1: Interpolacja czasowa w ramach kraju
-        df = impute_interpolate(df, col, group_by="country", sort_by="year", method="linear")
-
-        # Krok 2: Forward/backward fill dla krawedzi
-        df = impute_forward_backward(df, col, group_by="country")
-
-        # Krok 3: Mediana regionalna dla pozostalych (jesli jest kolumna region)
-        if "region" in df.columns and df[col].isna().any():
-            df = impute_by_group(df, col, group_by="region", method="median")
-
-        # Krok 4: Mediana globalna jako ostatecznosc
-        if df[col].isna().any():
-            global_median = df[col].median()
-            df[col] = df[col].fillna(global_median)
-
-        missing_after = df[col].isna().sum()
+    if not columns:
+        return df.copy(), imputation_stats
+
+    # Sortowanie i kody krajow raz dla wszystkich kolumn (sort_values zwraca
+    # nowy DataFrame) zamiast sortowania i groupby w kazdym kroku imputacji
+    df = df.sort_values(["country", "year"])
+    country_codes, _ = pd.factorize(df["country"], sort=False)
+
+    # Kolumny jako tablice numpy (w oryginalnym typie) przez wszystkie kroki -
+    # jeden odczyt i jeden zapis kolumny w DataFrame zamiast wyszukiwania
+    # po nazwie w kazdym kroku; biezaca liczba brakow liczona z tablic
+    arrays = {}
+    missing_before = {}
+    missing = {}
+
+    for col in columns:
+        dtype = df[col].dtype
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        missing_before[col] = missing[col] = int(np.count_nonzero(np.isnan(values)))
+
+        # Kroki 1-2: Interpolacja czasowa w ramach kraju + forward/backward
+        # fill dla krawedzi - jeden przebieg numpy na kolumne
+        if missing[col] > 0:
+            filled = interpolate_fill_grouped(values, country_codes)
+            arrays[col] = filled.astype(dtype, copy=False)
+            missing[col] = int(np.count_nonzero(np.isnan(filled)))
+
+    # Krok 3: Mediana regionalna dla pozostalych (jesli jest kolumna region) -
+    # jeden groupby dla wszystkich kolumn z brakami
+    remaining = [c for c in columns if missing[c] > 0]
+    if "region" in df.columns and remaining:
+        region_median = (
+            pd.DataFrame({c: arrays[c] for c in remaining}, index=df.index)
+            .groupby(df["region"], observed=True)
+            .transform("median")
+        )
+        for col in remaining:
+            # fillna na Series z tablicy (bez wyszukiwania kolumny w df) -
+            # te same reguly rzutowania typu co wczesniej
+            filled = pd.Series(arrays[col], index=df.index, copy=False).fillna(region_median[col])
+            arrays[col] = filled.to_numpy()
+            missing[col] = int(np.count_nonzero(np.isnan(arrays[col])))
+
+    for col in columns:
+        # Krok 4: Mediana globalna jako ostatecznosc (kolumna bez zadnej
+        # wartosci ma mediane NaN - braki zostaja)
+        if missing[col] > 0:
+            series = pd.Series(arrays[col], copy=False)
+            global_median = series.median()
+            if pd.notna(global_median):
+                arrays[col] = series.fillna(global_median).to_numpy()
+                missing[col] = 0
+
+        if col in arrays:
+            df[col] = arrays[col]
 
         imputation_stats[col] = {
-            "missing_before": missing_before,
-            "missing_after": missing_after,
-            "imputed": missing_before - missing_after
+            "missing_before": missing_before[col],
+            "missing_after": missing[col],
+            "imputed": missing_before[col] - missing[col]
         }
 
     return df, imputation_stats
 
 
-def create_missing_plots(df: pd.DataFrame, figures_dir: str) -> List[str]:
+def _missing_indicator(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Zwarta kopia ramki do wykresow brakow w procesach roboczych: float32 z
+    NaN w miejscu brakow (ten sam wynik isna() co df), rok bez zmian.
     """
-    Tworzenie wykresow brakow danych.
+    indicator = pd.DataFrame(
+        np.where(df.isna().to_numpy(), np.float32(np.nan), np.float32(0)),
+        index=df.index, columns=df.columns
+    )
+    if "year" in df.columns:
+        indicator["year"] = df["year"]
+    return indicator
+
+
+def create_missing_plots(
+    df: pd.DataFrame,
+    figures_dir: str,
+    executor: Optional[Executor] = None
+) -> List[str]:
+    """
+    Tworzenie wykresow brakow danych (rownolegle, jesli podano executor).
 
     Returns:
         Lista sciezek do zapisanych wykresow
     """
     os.makedirs(figures_dir, exist_ok=True)
-    saved_plots = []
-
-    # Bar plot brakow
-    try:
-        fig = plot_missing_bar(df, title="Braki danych wedlug zmiennych", top_n=25)
-        path = save_figure(fig, "missing_bar", figures_dir=figures_dir)
-        saved_plots.append(path)
-    except Exception as e:
-        print(f"    Blad tworzenia bar plotu: {e}")
-
-    # Heatmapa brakow
-    try:
-        fig = plot_missing_heatmap(df, title="Wzorce brakow danych")
-        path = save_figure(fig, "missing_heatmap", figures_dir=figures_dir)
-        saved_plots.append(path)
-    except Exception as e:
-        print(f"    Blad tworzenia heatmapy: {e}")
+
+    # Do procesow roboczych trafia tylko wzorzec brakow, a heatmapa dostaje
+    # od razu probke 500 wierszy, ktora i tak by wylosowala (ten sam seed)
+    data = df if executor is None else _missing_indicator(df)
+    pattern = data
+    if executor is not None and len(data) > 500:
+        pattern = data.sample(500, random_state=42).sort_index()
+
+    jobs = [
+        ("plot_missing_bar", data, (), {"title": "Braki danych wedlug zmiennych", "top_n": 25},
+         "missing_bar", "Blad tworzenia bar plotu"),
+        ("plot_missing_heatmap", pattern, (), {"title": "Wzorce brakow danych"},
+         "missing_heatmap", "Blad tworzenia heatmapy"),
+    ]
 
     # Braki wedlug roku
     if "year" in df.columns:
-        try:
-            fig = plot_missing_by_year(df, "year", title="Braki danych wedlug roku")
-            path = save_figure(fig, "missing_by_year", figures_dir=figures_dir)
-            saved_plots.append(path)
-        except Exception as e:
-            print(f"    Blad tworzenia wykresu brakow by year: {e}")
+        jobs.append(("plot_missing_by_year", data, ("year",), {"title": "Braki danych wedlug roku"},
+                     "missing_by_year", "Blad tworzenia wykresu brakow by year"))
 
-    return saved_plots
+    return render_plots(jobs, figures_dir, executor)
 
 
 def generate_missing_report(
-    df_before: pd.DataFrame,
+    shape_before: Tuple[int, int],
+    total_missing_before: int,
     df_after: pd.DataFrame,
     missing_stats: pd.DataFrame,
     country_missing: pd.DataFrame,
     year_missing: pd.DataFrame,
     imputation_stats: Dict,
-    plot_paths: List[str]
+    plot_paths: List[str],
+    digest: Optional[str] = None
 ) -> str:
     """
     Generuje raport analizy brakow.
 
+    Args:
+        digest: Skrot wejscia kroku (zapisywany przy raporcie, patrz run_step_07)
+
     Returns:
         Sciezka do zapisanego raportu
     """
@@ -241,9 +285,8 @@ def generate_missing_report(
         "i wymagaja starannej obslugi."
     )
 
-    total_missing_before = df_before.isna().sum().sum()
-    total_missing_after = df_after.isna().sum().sum()
-    total_cells = df_before.size
+    total_missing_after = total_nan(df_after)
+    total_cells = shape_before[0] * shape_before[1]
 
     report.add_key_value_table({
         "Lacznie komorek": f"{total_cells:,}",
@@ -327,9 +370,15 @@ def generate_missing_report(
     report.add_heading("Wyniki imputacji", level=2)
 
     if imputation_stats:
-        imp_df = pd.DataFrame([
-            {"variable": k, **v} for k, v in imputation_stats.items()
-        ])
+        # Kolumny z list zamiast listy slownikow (bez transpozycji wierszy)
+        variables = list(imputation_stats)
+        imp_df = pd.DataFrame({
+            "variable": variables,
+            **{
+                key: [imputation_stats[v][key] for v in variables]
+                for key in ("missing_before", "missing_after", "imputed")
+            }
+        })
         report.add_table(imp_df)
 
     # ==========================================================================
@@ -348,7 +397,7 @@ def generate_missing_report(
     report.add_bullet("`out/missing/missing_stats.csv` - statystyki brakow")
 
     # Save report
-    report_path = report.save("07_missing_data.md")
+    report_path = report.save("07_missing_data.md", digest=digest)
     return report_path
 
 
@@ -359,7 +408,9 @@ def save_missing_outputs(missing_stats: pd.DataFrame, country_missing: pd.DataFr
 
     missing_stats.to_csv(os.path.join(MISSING_DIR, "missing_stats.csv"), index=False)
     country_missing.to_csv(os.path.join(MISSING_DIR, "country_missing.csv"), index=False)
-    df_imputed.to_parquet(os.path.join(IMPUTED_DIR, "panel_imputed.parquet"), index=False)
+    # zstd i jedna grupa wierszy - mniejszy plik i jeden skan przy odczycie
+    write_parquet(df_imputed, os.path.join(IMPUTED_DIR, "panel_imputed.parquet"),
+                  compression="zstd", compression_level=3, row_group_size=max(len(df_imputed), 1))
 
 
 def run_step_07(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
@@ -373,7 +424,17 @@ def run_step_07(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print("Krok 7: Analiza brakow danych i imputacja")
     print("=" * 60)
 
-    df_before = df.copy()
+    # Raport i wykresy zaleza tylko od ramki wejsciowej i kodu - skrot
+    # liczony raz na poczatku; przy trafieniu wykresy i raport sa pomijane
+    digest = report_digest(
+        df, source=(__file__, utils.df.__file__, PLOTTING_SOURCE)
+    )
+    cached_path = cached_report("07_missing_data.md", digest)
+
+    # Do raportu potrzebne sa tylko skalary "przed" - bez kopii calej ramki
+    # (impute_data nie modyfikuje wejscia)
+    shape_before = df.shape
+    total_missing_before = total_nan(df)
 
     # 1. Statystyki brakow
     print("\n  Obliczanie statystyk brakow...")
@@ -389,8 +450,17 @@ def run_step_07(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     year_missing = analyze_missing_by_year(df)
 
     # 4. Tworzenie wykresow
-    print("\n  Tworzenie wykresow...")
-    plot_paths = create_missing_plots(df, MISSING_FIGURES_DIR)
+    plot_paths = []
+    if cached_path is None:
+        print("\n  Tworzenie wykresow...")
+        # Trzy niezalezne wykresy - w osobnych procesach, jesli jest wiecej
+        # niz jeden rdzen roboczy
+        workers = min(3, get_worker_cpu())
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                plot_paths = create_missing_plots(df, MISSING_FIGURES_DIR, executor)
+        else:
+            plot_paths = create_missing_plots(df, MISSING_FIGURES_DIR)
 
     # 5. Imputacja
     print("\n  Imputacja brakujacych wartosci...")
@@ -407,11 +477,14 @@ def run_step_07(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print(f"    Zapisano w: {MISSING_DIR}, {IMPUTED_DIR}")
 
     # 7. Generowanie raportu
-    print("\n  Generowanie raportu...")
-    report_path = generate_missing_report(
-        df_before, df_imputed, missing_stats, country_missing,
-        year_missing, imputation_stats, plot_paths
-    )
+    if cached_path is None:
+        print("\n  Generowanie raportu...")
+        report_path = generate_missing_report(
+            shape_before, total_missing_before, df_imputed, missing_stats, country_missing,
+            year_missing, imputation_stats, plot_paths, digest=digest
+        )
+    else:
+        report_path = cached_path
 
     print(f"\n Raport zapisany: {report_path}")
 
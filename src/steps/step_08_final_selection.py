@@ -14,16 +14,67 @@ Output:
 
 import pandas as pd
 import numpy as np
+import re
 from typing import Dict, List, Tuple, Optional
 import os
 
 from constants import REPORT_DIR, OUT_DIR
-from utils.report import ReportBuilder
+from utils.report import ReportBuilder, report_digest, cached_report
+from utils.fs import write_parquet
+import utils.df
 from utils.df import df_info
 
 
 FINAL_DIR = os.path.join(OUT_DIR, "final")
 
+# Dodatkowe zmienne wybierane po fragmencie nazwy (nazwy roznia sie miedzy zrodlami)
+_EXTRA_VARS_RX = re.compile(r"renewable|electricity|access", re.IGNORECASE)
+
+# Definicja grup zmiennych do finalnego zbioru (stala modulu - nie budowana
+# przy kazdym wywolaniu select_variables)
+_VARIABLE_GROUPS = {
+    "identifiers": ["country", "year", "iso_code", "region"],
+    "dependent": ["co2", "co2_per_capita", "co2_per_capita_log"],
+    "main_predictors": [
+        "gdp", "gdp_per_capita", "gdp_per_capita_log",
+        "gdp_per_capita_sq", "gdp_per_capita_cu",
+        "population", "population_log"
+    ],
+    "energy": [
+        "primary_energy_consumption", "primary_energy_consumption_log",
+        "coal_co2", "oil_co2", "gas_co2",
+        "fossil_co2", "fossil_share", "coal_share", "oil_share", "gas_share",
+        "emission_intensity", "energy_intensity"
+    ],
+    "renewable": [
+        "access_to_electricity_of_population",
+        "renewable_energy_share_in_the_total_final_energy_consumption",
+        "electricity_from_renewables_twh",
+        "renewable_share_change"
+    ],
+    "dynamics": [
+        "co2_change", "co2_pct_change",
+        "co2_per_capita_change", "co2_per_capita_pct_change",
+        "gdp_change", "gdp_pct_change"
+    ],
+    "categorical": [
+        "development_level"
+    ],
+    # Opoznienia z kroku 5 (group_shift w jednym przebiegu) - pierwsze
+    # `lag` lat kazdego kraju to NaN (brak wypelnienia zerami)
+    "lagged": [
+        "co2_per_capita_lag1", "co2_per_capita_lag5",
+        "gdp_lag1", "gdp_lag5"
+    ],
+    "country_metadata": [
+        "urban_population", "agricultural_land",
+        "latitude", "longitude"
+    ]
+}
+
+# Wszystkie zmienne z grup w kolejnosci grup, bez duplikatow
+_ALL_VARS_ORDERED = tuple(dict.fromkeys(v for group_vars in _VARIABLE_GROUPS.values() for v in group_vars))
+
 
 def select_countries(df: pd.DataFrame, max_missing_pct: float = 30.0) -> Tuple[pd.DataFrame, Dict]:
     """
@@ -41,15 +92,25 @@ def select_countries(df: pd.DataFrame, max_missing_pct: float = 30.0) -> Tuple[p
     key_cols = ["co2", "co2_per_capita", "gdp", "population"]
     existing_cols = [c for c in key_cols if c in df.columns]
 
-    country_missing = df.groupby("country")[existing_cols].apply(
-        lambda x: x.isna().sum().sum() / x.size * 100
-    )
+    # Jedna maska brakow zliczana wierszami i sumy w krajach przez bincount
+    # na kodach krajow (posortowanych jak w groupby) - bez apply z lambda
+    codes, countries = pd.factorize(df["country"], sort=True)
+    row_missing = df[existing_cols].isna().to_numpy().sum(axis=1)
+    has_country = codes >= 0
+    n_missing = np.bincount(codes[has_country], weights=row_missing[has_country], minlength=len(countries))
+    n_cells = np.bincount(codes[has_country], minlength=len(countries)) * len(existing_cols)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        country_missing = n_missing / n_cells * 100
 
     # Kraje do zachowania
-    valid_countries = country_missing[country_missing <= max_missing_pct].index.tolist()
-    excluded_countries = country_missing[country_missing > max_missing_pct].index.tolist()
+    keep_country = country_missing <= max_missing_pct
+    valid_countries = countries[keep_country].tolist()
+    excluded_countries = countries[country_missing > max_missing_pct].tolist()
 
-    df_filtered = df[df["country"].isin(valid_countries)].copy()
+    # Filtr wierszy przez kody krajow (bez ponownego haszowania nazw w isin)
+    keep_rows = np.zeros(len(df), dtype=bool)
+    keep_rows[has_country] = keep_country[codes[has_country]]
+    df_filtered = df[keep_rows].copy()
 
     stats["countries_after"] = df_filtered["country"].nunique()
     stats["countries_excluded"] = len(excluded_countries)
@@ -71,7 +132,8 @@ def select_years(df: pd.DataFrame, min_year: int = 2000, max_year: int = 2020) -
     }
 
     if "year" in df.columns:
-        df_filtered = df[(df["year"] >= min_year) & (df["year"] <= max_year)].copy()
+        # Jedna maska (between) zamiast dwoch porownan laczonych przez &
+        df_filtered = df[df["year"].between(min_year, max_year, inclusive="both")].copy()
     else:
         df_filtered = df.copy()
 
@@ -88,66 +150,17 @@ def select_variables(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
     Returns:
         Tuple (DataFrame z wybranymi zmiennymi, statystyki)
     """
-    # Definicja grup zmiennych
-    variable_groups = {
-        "identifiers": ["country", "year", "iso_code", "region"],
-        "dependent": ["co2", "co2_per_capita", "co2_per_capita_log"],
-        "main_predictors": [
-            "gdp", "gdp_per_capita", "gdp_per_capita_log",
-            "gdp_per_capita_sq", "gdp_per_capita_cu",
-            "population", "population_log"
-        ],
-        "energy": [
-            "primary_energy_consumption", "primary_energy_consumption_log",
-            "coal_co2", "oil_co2", "gas_co2",
-            "fossil_co2", "fossil_share", "coal_share", "oil_share", "gas_share",
-            "emission_intensity", "energy_intensity"
-        ],
-        "renewable": [
-            "access_to_electricity_of_population",
-            "renewable_energy_share_in_the_total_final_energy_consumption",
-            "electricity_from_renewables_twh",
-            "renewable_share_change"
-        ],
-        "dynamics": [
-            "co2_change", "co2_pct_change",
-            "co2_per_capita_change", "co2_per_capita_pct_change",
-            "gdp_change", "gdp_pct_change"
-        ],
-        "categorical": [
-            "development_level"
-        ],
-        "lagged": [
-            "co2_per_capita_lag1", "co2_per_capita_lag5",
-            "gdp_lag1", "gdp_lag5"
-        ],
-        "country_metadata": [
-            "urban_population", "agricultural_land",
-            "latitude", "longitude"
-        ]
-    }
-
-    # Zbierz wszystkie zmienne do zachowania (bez duplikatow)
-    vars_to_keep = []
-    seen = set()
-    for group_vars in variable_groups.values():
-        for v in group_vars:
-            if v not in seen:
-                vars_to_keep.append(v)
-                seen.add(v)
-
     # Filtruj tylko istniejace kolumny
-    existing_vars = [v for v in vars_to_keep if v in df.columns]
+    col_set = set(df.columns)
+    existing_vars = [v for v in _ALL_VARS_ORDERED if v in col_set]
+    selected = set(existing_vars)
 
-    # Dodaj zmienne ktore moga miec rozne nazwy (bez duplikatow)
+    # Dodaj zmienne ktore moga miec rozne nazwy (bez duplikatow - zbior
+    # `selected` sledzi juz wybrane kolumny)
     for col in df.columns:
-        col_lower = col.lower()
-        if any(keyword in col_lower for keyword in ["renewable", "electricity", "access"]):
-            if col not in existing_vars:
-                existing_vars.append(col)
-
-    # Usun ewentualne duplikaty
-    existing_vars = list(dict.fromkeys(existing_vars))
+        if col not in selected and _EXTRA_VARS_RX.search(col):
+            existing_vars.append(col)
+            selected.add(col)
 
     df_selected = df[existing_vars].copy()
 
@@ -155,8 +168,8 @@ def select_variables(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         "vars_before": len(df.columns),
         "vars_after": len(df_selected.columns),
         "vars_by_group": {
-            group: len([v for v in vars if v in df_selected.columns])
-            for group, vars in variable_groups.items()
+            group: sum(v in selected for v in vars)
+            for group, vars in _VARIABLE_GROUPS.items()
         }
     }
 
@@ -198,16 +211,20 @@ def validate_final_dataset(df: pd.DataFrame) -> Dict:
 
 
 def generate_selection_report(
-    df_before: pd.DataFrame,
+    shape_before: Tuple[int, int],
     df_after: pd.DataFrame,
     country_stats: Dict,
     year_stats: Dict,
     var_stats: Dict,
-    validation: Dict
+    validation: Dict,
+    digest: Optional[str] = None
 ) -> str:
     """
     Generuje raport selekcji.
 
+    Args:
+        digest: Skrot wejscia kroku (zapisywany przy raporcie, patrz run_step_08)
+
     Returns:
         Sciezka do zapisanego raportu
     """
@@ -223,9 +240,9 @@ def generate_selection_report(
     )
 
     report.add_key_value_table({
-        "Wiersze przed selekcja": f"{len(df_before):,}",
+        "Wiersze przed selekcja": f"{shape_before[0]:,}",
         "Wiersze po selekcji": f"{len(df_after):,}",
-        "Kolumny przed selekcja": len(df_before.columns),
+        "Kolumny przed selekcja": shape_before[1],
         "Kolumny po selekcji": len(df_after.columns)
     })
 
@@ -336,7 +353,7 @@ def generate_selection_report(
     report.add_bullet("Wizualizacji i raportowania")
 
     # Save report
-    report_path = report.save("08_final_selection.md")
+    report_path = report.save("08_final_selection.md", digest=digest)
     return report_path
 
 
@@ -344,7 +361,8 @@ def save_final_data(df: pd.DataFrame) -> str:
     """Zapisanie finalnego zbioru danych."""
     os.makedirs(FINAL_DIR, exist_ok=True)
     path = os.path.join(FINAL_DIR, "final_panel.parquet")
-    df.to_parquet(path, index=False)
+    # zstd i jedna grupa wierszy - mniejszy plik i jeden skan przy odczycie
+    write_parquet(df, path, compression="zstd", compression_level=3, row_group_size=max(len(df), 1))
     return path
 
 
@@ -359,7 +377,14 @@ def run_step_08(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print("Krok 8: Wybor zmiennych i rekordow")
     print("=" * 60)
 
-    df_before = df.copy()
+    # Raport zalezy tylko od ramki wejsciowej i kodu - bez zmian wejscia
+    # nie jest budowany ponownie
+    digest = report_digest(df, source=(__file__, utils.df.__file__))
+    cached_path = cached_report("08_final_selection.md", digest)
+
+    # Do raportu wystarczy ksztalt ramki "przed" - funkcje select_* zwracaja
+    # nowe ramki, wejscie nie jest modyfikowane
+    shape_before = df.shape
 
     # 1. Selekcja krajow
     print("\n  Selekcja krajow (max 30% brakow)...")
@@ -387,10 +412,13 @@ def run_step_08(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
     print(f"    Zapisano w: {FINAL_DIR}")
 
     # 6. Generowanie raportu
-    print("\n  Generowanie raportu...")
-    report_path = generate_selection_report(
-        df_before, df, country_stats, year_stats, var_stats, validation
-    )
+    if cached_path is None:
+        print("\n  Generowanie raportu...")
+        report_path = generate_selection_report(
+            shape_before, df, country_stats, year_stats, var_stats, validation, digest=digest
+        )
+    else:
+        report_path = cached_path
 
     print(f"\n Raport zapisany: {report_path}")
 
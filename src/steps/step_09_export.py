@@ -26,16 +26,17 @@ from datetime import datetime
 from constants import REPORT_DIR, OUT_DIR
 from utils.report import ReportBuilder, create_codebook
 from utils.df import df_info, df_describe_all
+from utils.fs import write_csv_arrow, write_parquet
 
 
 FINAL_DIR = os.path.join(OUT_DIR, "final")
 
 
 def export_to_csv(df: pd.DataFrame, filename: str = "final_dataset.csv") -> str:
-    """Eksport do formatu CSV."""
+    """Eksport do formatu CSV (writer pyarrow, awaryjnie pandas to_csv)."""
     os.makedirs(FINAL_DIR, exist_ok=True)
     path = os.path.join(FINAL_DIR, filename)
-    df.to_csv(path, index=False)
+    write_csv_arrow(df, path)
     return path
 
 
@@ -43,7 +44,9 @@ def export_to_parquet(df: pd.DataFrame, filename: str = "final_dataset.parquet")
     """Eksport do formatu Parquet."""
     os.makedirs(FINAL_DIR, exist_ok=True)
     path = os.path.join(FINAL_DIR, filename)
-    df.to_parquet(path, index=False)
+    # zstd + slowniki dla powtarzalnych kolumn (country, region, development_level)
+    write_parquet(df, path, compression="zstd", compression_level=3, row_group_size=64_000,
+                  use_dictionary=True, data_page_size=1 << 20)
     return path
 
 
@@ -101,44 +104,29 @@ def generate_codebook(df: pd.DataFrame) -> Tuple[str, str]:
     with open(md_path, "w", encoding="utf-8") as f:
         f.write(codebook_md)
 
-    # Generuj codebook jako CSV
-    rows = []
-    for col in df.columns:
-        dtype = str(df[col].dtype)
-        non_null = df[col].notna().sum()
-        null_pct = df[col].isna().sum() / len(df) * 100
-        unique = df[col].nunique()
-
-        # Statystyki dla zmiennych numerycznych
-        if pd.api.types.is_numeric_dtype(df[col]):
-            stats = df[col].describe()
-            rows.append({
-                "variable": col,
-                "type": dtype,
-                "description": descriptions.get(col, ""),
-                "non_null": non_null,
-                "missing_pct": round(null_pct, 2),
-                "unique": unique,
-                "mean": round(stats.get("mean", np.nan), 4),
-                "std": round(stats.get("std", np.nan), 4),
-                "min": round(stats.get("min", np.nan), 4),
-                "max": round(stats.get("max", np.nan), 4)
-            })
-        else:
-            rows.append({
-                "variable": col,
-                "type": dtype,
-                "description": descriptions.get(col, ""),
-                "non_null": non_null,
-                "missing_pct": round(null_pct, 2),
-                "unique": unique,
-                "mean": np.nan,
-                "std": np.nan,
-                "min": np.nan,
-                "max": np.nan
-            })
-
-    codebook_df = pd.DataFrame(rows)
+    # Generuj codebook jako CSV - statystyki policzone raz dla calej ramki
+    # (jeden describe zamiast describe/notna/isna/nunique dla kazdej kolumny)
+    numeric_cols = [
+        col for col in df.columns
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+    ]
+    stat_cols = ["mean", "std", "min", "max"]
+    if numeric_cols:
+        desc = df[numeric_cols].describe().T[stat_cols].round(4)
+    else:
+        desc = pd.DataFrame(columns=stat_cols, dtype=np.float64)
+    # Kolumny nienumeryczne (i bool) -> NaN, jak wczesniej
+    desc = desc.reindex(df.columns)
+
+    codebook_df = pd.DataFrame({
+        "variable": df.columns,
+        "type": [str(dtype) for dtype in df.dtypes],
+        "description": [descriptions.get(col, "") for col in df.columns],
+        "non_null": df.notna().sum().to_numpy(),
+        "missing_pct": (df.isna().sum() / len(df) * 100).round(2).to_numpy(),
+        "unique": df.nunique().to_numpy(),
+        **{stat: desc[stat].to_numpy(dtype=np.float64) for stat in stat_cols}
+    })
     csv_path = os.path.join(FINAL_DIR, "codebook.csv")
     codebook_df.to_csv(csv_path, index=False)
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Moduly projektu importowane jak w main.py (src/ na sciezce)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+from utils.df import (
+    correlation_matrix, top_correlations, describe_numeric, interpolate_fill_grouped,
+    impute_interpolate, impute_forward_backward, group_shift, group_shift_index
+)
+
+
+def _assert_matches(got: pd.DataFrame, expected: pd.DataFrame, atol: float = 1e-9):
+    got, expected = got.to_numpy(), expected.to_numpy()
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+    np.testing.assert_allclose(got, expected, rtol=0, atol=atol, equal_nan=True)
+
+
+def _correlation_frame(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    # Zero-inflated (jak coal_co2), duze wartosci (jak gdp), kolumna stala
+    # na wierszach wspolnych z inna kolumna oraz kolumna calkowicie stala
+    zero_inflated = rng.normal(size=n)
+    zero_inflated[rng.random(n) < 0.6] = 0.0
+    large = rng.lognormal(size=n) * 1e12
+    large[rng.random(n) < 0.3] = np.nan
+    subset_constant = np.where(rng.random(n) < 0.5, 5.0, rng.normal(size=n) * 1e6)
+    subset_constant[rng.random(n) < 0.2] = np.nan
+    disjoint = np.where(np.isnan(subset_constant), rng.normal(size=n), np.nan)
+    return pd.DataFrame({
+        "zero_inflated": zero_inflated,
+        "large": large,
+        "subset_constant": subset_constant,
+        "disjoint": disjoint,
+        "constant": np.full(n, 3.0),
+    })
+
+
+def test_correlation_matrix_matches_pandas():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        df = _correlation_frame(rng, int(rng.integers(2, 80)))
+        _assert_matches(correlation_matrix(df), df.corr())
+
+
+def test_correlation_matrix_constant_on_shared_rows_is_nan():
+    df = pd.DataFrame({
+        "a": [0.0, 0.0, 0.0, 1e9, -1e9],
+        "b": [1.0, 2.0, 3.0, np.nan, np.nan],
+    })
+    corr = correlation_matrix(df)
+    assert np.isnan(corr.loc["a", "b"])
+    assert corr.loc["a", "a"] == 1.0
+    assert top_correlations(df).empty
+
+
+def test_correlation_matrix_diagonal_and_range():
+    rng = np.random.default_rng(1)
+    df = _correlation_frame(rng, 200)
+    values = correlation_matrix(df).to_numpy()
+    diag = np.diagonal(values)
+    assert np.all(diag[~np.isnan(diag)] == 1.0)
+    assert np.isnan(values[4, 4])
+    assert np.nanmax(np.abs(values)) <= 1.0
+
+
+def _describe_frame(rng: np.random.Generator) -> pd.DataFrame:
+    n = 40
+    with_nan = rng.normal(size=n)
+    with_nan[rng.random(n) < 0.3] = np.nan
+    frame = pd.DataFrame({
+        "normal": rng.normal(size=n),
+        "with_nan": with_nan,
+        "skewed": rng.lognormal(size=n) * 1e9,
+        "offset": 1e12 + rng.normal(size=n),
+        "constant": np.full(n, 7.5),
+        "constant_offset": np.full(n, 1e12 + 0.1),
+        "integers": rng.integers(0, 100, n),
+        "all_nan": np.full(n, np.nan),
+    })
+    # Kolumny z 1, 2 i 3 wartosciami
+    for k in (1, 2, 3):
+        values = np.full(n, np.nan)
+        values[rng.choice(n, k, replace=False)] = rng.normal(size=k)
+        frame[f"n{k}"] = values
+    return frame
+
+
+def test_describe_numeric_matches_pandas():
+    rng = np.random.default_rng(2)
+    df = _describe_frame(rng)
+    stats = describe_numeric(df)
+
+    expected = df.describe().T
+    for ours, theirs in [("count", "count"), ("mean", "mean"), ("std", "std"),
+                         ("min", "min"), ("q25", "25%"), ("median", "50%"),
+                         ("q75", "75%"), ("max", "max")]:
+        np.testing.assert_allclose(
+            stats[ours].to_numpy(dtype=np.float64), expected[theirs].to_numpy(dtype=np.float64),
+            rtol=1e-12, atol=0, equal_nan=True, err_msg=ours
+        )
+    np.testing.assert_allclose(stats["skewness"], df.skew(), rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(stats["kurtosis"], df.kurt(), rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+def test_describe_numeric_non_numeric_columns_are_nan():
+    df = pd.DataFrame({"x": [1.0, 2.0, 4.0], "name": ["a", "b", "c"]})
+    stats = describe_numeric(df, columns=["x", "name"])
+
+    assert list(stats.index) == ["x", "name"]
+    assert stats.loc["name"].isna().all()
+    assert stats.loc["x", "median"] == 2.0
+
+
+def _gappy_groups(rng: np.random.Generator, n_groups: int = 30, max_len: int = 12):
+    # Grupy ciagle (jak panel po sortowaniu country, year) z lukami na
+    # poczatku, w srodku i na koncu oraz grupami bez zadnej wartosci
+    lengths = rng.integers(1, max_len, n_groups)
+    codes = np.repeat(np.arange(n_groups), lengths)
+    values = rng.normal(size=len(codes)) * 10 ** rng.integers(0, 6, len(codes))
+    values[rng.random(len(codes)) < 0.4] = np.nan
+    values[codes == 0] = np.nan
+    return values, codes
+
+
+def test_interpolate_fill_grouped_matches_pandas():
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        values, codes = _gappy_groups(rng)
+        grouped = pd.Series(values).groupby(codes)
+
+        expected = {
+            (True, True): grouped.transform(lambda x: x.interpolate(method="linear").ffill().bfill()),
+            (True, False): grouped.transform(lambda x: x.interpolate(method="linear")),
+            (False, True): grouped.transform(lambda x: x.ffill().bfill()),
+        }
+        for (linear, backfill), series in expected.items():
+            got = interpolate_fill_grouped(values, codes, linear=linear, backfill=backfill)
+            np.testing.assert_array_equal(got, series.to_numpy(), err_msg=f"{linear=}, {backfill=}")
+
+
+def test_interpolate_fill_grouped_keeps_rows_without_group():
+    values = np.array([1.0, np.nan, 3.0, np.nan, np.nan, 6.0])
+    codes = np.array([0, 0, 0, -1, 1, 1])
+
+    got = interpolate_fill_grouped(values, codes)
+
+    np.testing.assert_array_equal(got, [1.0, 2.0, 3.0, np.nan, 6.0, 6.0])
+    # Wejscie bez zmian
+    assert np.isnan(values[1])
+
+
+def _shuffled_panel(rng: np.random.Generator, dtype) -> pd.DataFrame:
+    values, codes = _gappy_groups(rng)
+    df = pd.DataFrame({
+        "country": np.array([f"c{c}" for c in codes]),
+        "year": np.concatenate([np.arange(np.count_nonzero(codes == c)) for c in np.unique(codes)]),
+        "value": values.astype(dtype),
+    })
+    return df.sample(frac=1.0, random_state=int(rng.integers(1 << 31))).reset_index(drop=True)
+
+
+def test_impute_interpolate_matches_groupby_transform():
+    rng = np.random.default_rng(4)
+    for dtype in (np.float64, np.float32):
+        df = _shuffled_panel(rng, dtype)
+
+        got = impute_interpolate(df, "value", group_by="country", sort_by="year")
+
+        ordered = df.sort_values(["country", "year"])
+        expected = ordered.groupby("country")["value"].transform(
+            lambda x: x.interpolate(method="linear")
+        )
+        pd.testing.assert_series_equal(got["value"], expected)
+
+
+def test_impute_forward_backward_matches_groupby_transform():
+    rng = np.random.default_rng(5)
+    for dtype in (np.float64, np.float32):
+        df = _shuffled_panel(rng, dtype)
+        df["country"] = df["country"].astype("category")
+
+        got = impute_forward_backward(df, "value", group_by="country")
+
+        expected = df.groupby("country", observed=True)["value"].transform(lambda x: x.ffill().bfill())
+        pd.testing.assert_series_equal(got["value"], expected)
+        # Wejscie bez zmian
+        assert df["value"].isna().any()
+
+
+def test_impute_forward_backward_keeps_rows_without_group():
+    df = pd.DataFrame({"country": ["a", None, "a"], "value": [1.0, 5.0, np.nan]})
+
+    got = impute_forward_backward(df, "value", group_by="country")
+
+    assert got["value"].tolist() == [1.0, 5.0, 1.0]
+
+
+def test_group_shift_matches_groupby_shift():
+    rng = np.random.default_rng(6)
+    for _ in range(30):
+        values, codes = _gappy_groups(rng)
+        # Wiersze bez grupy (kod -1, jak NaN z pd.factorize) na koncu - tak
+        # jak po sort_values, ktore ustawia braki klucza na koncu
+        n_missing = int(rng.integers(0, 4))
+        values = np.concatenate([values, rng.normal(size=n_missing)])
+        codes = np.concatenate([codes, np.full(n_missing, -1)])
+        keys = pd.Series(codes).replace(-1, np.nan)
+
+        for lag in (1, 2, 3, -1):
+            expected = pd.Series(values).groupby(keys).shift(lag).to_numpy()
+            np.testing.assert_array_equal(group_shift(values, codes, lag), expected, err_msg=f"{lag=}")
+            np.testing.assert_array_equal(
+                group_shift(values, codes, lag, index=group_shift_index(codes, lag)), expected
+            )
+
+
+def test_group_shift_integer_values_and_empty_input():
+    codes = np.array([0, 0, 0, 1, 1])
+    got = group_shift(np.array([1, 2, 3, 4, 5]), codes)
+
+    np.testing.assert_array_equal(got, [np.nan, 1.0, 2.0, np.nan, 4.0])
+    assert group_shift(np.array([]), np.array([], dtype=np.intp)).shape == (0,)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from steps.step_02_cleaning import fix_data_types
+
+
+def test_fix_data_types_converts_currency_and_percent_strings():
+    df = pd.DataFrame({
+        "GDP": ["$1,000", "$2,500", None, "$30"],
+        "Land": ["10.5%", "3%", "7 %", "0.25%"],
+        "name": ["a", "b", "c", "d"],
+    })
+
+    fixed, converted = fix_data_types(df)
+
+    assert converted == ["GDP", "Land"]
+    np.testing.assert_array_equal(fixed["GDP"].to_numpy(), [1000.0, 2500.0, np.nan, 30.0])
+    np.testing.assert_array_equal(fixed["Land"].to_numpy(), [10.5, 3.0, 7.0, 0.25])
+    assert pd.api.types.is_numeric_dtype(fixed["GDP"])
+    assert not pd.api.types.is_numeric_dtype(fixed["name"])
+
+
+def test_fix_data_types_handles_object_columns():
+    df = pd.DataFrame({"GDP": pd.Series(["$1,000", "$2,500"], dtype=object)})
+
+    fixed, converted = fix_data_types(df)
+
+    assert converted == ["GDP"]
+    np.testing.assert_array_equal(fixed["GDP"].to_numpy(), [1000.0, 2500.0])
+    # Wejscie bez zmian
+    assert df["GDP"].tolist() == ["$1,000", "$2,500"]
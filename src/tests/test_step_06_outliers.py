@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from steps.step_06_outliers import _top_n_positions, identify_extreme_cases
+
+
+def _values_with_ties(rng: np.random.Generator, n: int) -> np.ndarray:
+    # Male liczby calkowite - duzo remisow, do tego braki i wartosci <= 0
+    values = rng.integers(-3, 8, n).astype(np.float64)
+    values[rng.random(n) < 0.2] = np.nan
+    return values
+
+
+def test_top_n_positions_matches_nlargest_nsmallest():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        size = int(rng.integers(0, 40))
+        df = pd.DataFrame({"v": _values_with_ties(rng, size)})
+        values = df["v"].to_numpy()
+
+        for n in (0, 1, 3, 10, 50):
+            np.testing.assert_array_equal(
+                _top_n_positions(values, n, largest=True),
+                df.nlargest(n, "v", keep="first").index.to_numpy()
+            )
+            np.testing.assert_array_equal(
+                _top_n_positions(values, n, largest=False),
+                df.nsmallest(n, "v", keep="first").index.to_numpy()
+            )
+
+
+def test_top_n_positions_with_mask_matches_filtered_nsmallest():
+    rng = np.random.default_rng(8)
+    for _ in range(100):
+        df = pd.DataFrame({"v": _values_with_ties(rng, int(rng.integers(1, 40)))})
+        values = df["v"].to_numpy()
+        mask = values > 0
+
+        np.testing.assert_array_equal(
+            _top_n_positions(values, 10, largest=False, mask=mask),
+            df[df["v"] > 0].nsmallest(10, "v", keep="first").index.to_numpy()
+        )
+
+
+def test_identify_extreme_cases_high_and_low():
+    df = pd.DataFrame({
+        "country": list("abcdef"),
+        "year": [2000] * 6,
+        "gdp": [5.0, -1.0, 0.0, 9.0, np.nan, 2.0],
+    })
+
+    cases = identify_extreme_cases(df, "gdp", n_top=2)
+
+    assert cases["country"].tolist() == ["d", "a", "f", "a"]
+    assert cases["type"].tolist() == ["high", "high", "low", "low"]
@@ -20,16 +20,20 @@ def last_index_of(l, value):
 
 def flatten(l):
     items = []
-    for item in l:
-        if isinstance(item, list):
-            items.extend(flatten(item))
-        else:
+    stack = [iter(l)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
             items.append(item)
+        else:
+            stack.pop()
     return items
 
 
 def unique(l):
-    return list(set(l))
+    return list(dict.fromkeys(l))
 
 
 def to_chunks(arr: list, chunk_size: int) -> list:
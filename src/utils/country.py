@@ -9,6 +9,7 @@ Uses pycountry for standard lookups, adds:
 """
 
 import pycountry
+from functools import lru_cache
 from typing import Optional, List, Set
 
 
@@ -79,6 +80,7 @@ AGGREGATES: Set[str] = {
 }
 
 
+@lru_cache(maxsize=4096)
 def is_aggregate(name: str) -> bool:
     """
     Check if name is an aggregate/grouping rather than a real country.
@@ -188,6 +190,9 @@ COUNTRY_ALIASES: dict = {
 }
 
 
+# Name lookups are pure and callers repeat the same few hundred names, so
+# results (including slow pycountry fuzzy searches) are cached per input
+@lru_cache(maxsize=4096)
 def standardize_country_name(name: str) -> str:
     """
     Standardize country name to pycountry standard form.
@@ -222,6 +227,7 @@ def standardize_country_name(name: str) -> str:
     return name
 
 
+@lru_cache(maxsize=4096)
 def get_country_iso(name: str) -> Optional[str]:
     """
     Get ISO 3166-1 alpha-3 code for country name.
@@ -253,6 +259,7 @@ def get_country_iso(name: str) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=4096)
 def get_country_from_iso(iso_code: str) -> Optional[str]:
     """
     Get country name from ISO code.
@@ -504,6 +511,7 @@ def get_region(iso_code: str) -> Optional[str]:
     return REGION_MAPPING.get(iso_code.upper())
 
 
+@lru_cache(maxsize=4096)
 def get_region_by_name(country_name: str) -> Optional[str]:
     """
     Get region/continent for a country name.
@@ -535,9 +543,14 @@ def add_region_column(df, country_col: str = "country", iso_col: Optional[str] =
     df = df.copy()
 
     if iso_col and iso_col in df.columns:
-        df["region"] = df[iso_col].apply(get_region)
+        source, lookup = df[iso_col], get_region
     else:
-        df["region"] = df[country_col].apply(get_region_by_name)
+        source, lookup = df[country_col], get_region_by_name
+
+    # Look up each distinct value once and map the dict over the rows
+    # instead of calling the lookup for every row via apply
+    regions = {value: lookup(value) for value in source.dropna().unique()}
+    df["region"] = source.map(regions)
 
     return df
 
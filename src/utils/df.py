@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from typing import Optional, List, Union, Literal
+from typing import Optional, List, Union, Literal, Tuple
 import re
 
 
@@ -16,16 +16,37 @@ def df_info(df: pd.DataFrame) -> dict:
     Returns:
         dict with keys: rows, cols, dtypes, memory_mb, missing_total, missing_pct
     """
+    missing_total = total_nan(df)
     return {
         "rows": len(df),
         "cols": len(df.columns),
         "dtypes": df.dtypes.value_counts().to_dict(),
         "memory_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2),
-        "missing_total": df.isna().sum().sum(),
-        "missing_pct": round(df.isna().sum().sum() / df.size * 100, 2),
+        "missing_total": missing_total,
+        "missing_pct": round(missing_total / df.size * 100, 2),
     }
 
 
+def total_nan(df: pd.DataFrame) -> int:
+    """
+    Count missing cells in a DataFrame.
+
+    Reduces column by column instead of materializing a full boolean frame
+    and summing it twice; integer/bool columns cannot hold NaN and are skipped.
+    """
+    total = 0
+    for i, dtype in enumerate(df.dtypes):
+        kind = dtype.kind if isinstance(dtype, np.dtype) else None
+        if kind in ("i", "u", "b"):
+            continue
+        values = df.iloc[:, i]
+        if kind in ("f", "c"):
+            total += np.count_nonzero(np.isnan(values.to_numpy()))
+        else:
+            total += np.count_nonzero(values.isna().to_numpy())
+    return int(total)
+
+
 def df_missing_summary(df: pd.DataFrame) -> pd.DataFrame:
     """
     Generate a summary of missing values per column.
@@ -107,6 +128,111 @@ def df_describe_all(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(stats)
 
 
+def _lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Linear interpolation in the same form as numpy's quantile, so results match."""
+    with np.errstate(invalid="ignore"):
+        diff = b - a
+        out = a + diff * t
+        out = np.where(t >= 0.5, b - diff * (1 - t), out)
+    return np.where(a == b, a, out)
+
+
+def _column_stats(V: np.ndarray) -> dict:
+    """
+    Descriptive statistics for every row of V (one variable per row,
+    NaN = missing) from a single sort and one set of centered sums.
+
+    Moments follow pandas (ddof=1 std, bias-corrected skew and kurtosis with
+    the same round-off guards); quantiles use linear interpolation as in
+    Series.quantile.
+    """
+    k, n = V.shape
+    mask = np.isnan(V)
+    count = (n - mask.sum(axis=1)).astype(np.float64)
+    filled = np.where(mask, 0.0, V)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = filled.sum(axis=1) / count
+        adjusted = np.where(mask, 0.0, V - mean[:, None])
+        adjusted2 = adjusted**2
+        m2 = adjusted2.sum(axis=1)
+        m3 = (adjusted2 * adjusted).sum(axis=1)
+        m4 = (adjusted2**2).sum(axis=1)
+
+        # Treat round-off sized moments of constant data as zero
+        max_abs = np.abs(filled).max(axis=1, initial=0.0)
+        eps = np.finfo(np.float64).eps
+        m2 = np.where(np.abs(m2) < (eps * max_abs) ** 2 * count, 0.0, m2)
+        m3 = np.where(np.abs(m3) < (eps * max_abs) ** 3 * count, 0.0, m3)
+        m4 = np.where(np.abs(m4) < (eps * max_abs) ** 4 * count, 0.0, m4)
+
+        std = np.sqrt(m2 / (count - 1))
+        skew = (count * (count - 1) ** 0.5 / (count - 2)) * (m3 / m2**1.5)
+        skew = np.where(m2 == 0, 0.0, skew)
+        denominator = (count - 2) * (count - 3) * m2**2
+        kurt = (count * (count + 1) * (count - 1) * m4 / denominator
+                - 3 * (count - 1) ** 2 / ((count - 2) * (count - 3)))
+        kurt = np.where(denominator == 0, 0.0, kurt)
+
+    std[count < 2] = np.nan
+    skew[count < 3] = np.nan
+    kurt[count < 4] = np.nan
+
+    # One sort per variable gives min, max and all quantiles (NaN sort last)
+    V_sorted = np.sort(V, axis=1)
+    last = np.maximum(count.astype(np.intp) - 1, 0)
+    rows = np.arange(k)
+    empty = count == 0
+
+    def quantile(q: float) -> np.ndarray:
+        pos = q * last
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, last)
+        return _lerp(V_sorted[rows, lo], V_sorted[rows, hi], pos - lo)
+
+    stats = {
+        "count": count.astype(np.int64),
+        "mean": mean,
+        "std": std,
+        "min": V_sorted[:, 0] if n else np.full(k, np.nan),
+        "q25": quantile(0.25) if n else np.full(k, np.nan),
+        "median": quantile(0.5) if n else np.full(k, np.nan),
+        "q75": quantile(0.75) if n else np.full(k, np.nan),
+        "max": V_sorted[rows, last] if n else np.full(k, np.nan),
+        "skewness": skew,
+        "kurtosis": kurt,
+    }
+    for key in ("mean", "min", "q25", "median", "q75", "max"):
+        stats[key] = np.where(empty, np.nan, stats[key])
+    return stats
+
+
+def describe_numeric(
+    df: pd.DataFrame, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    describe() plus skewness and kurtosis for numeric columns in one pass
+    over a single float64 block.
+
+    Args:
+        columns: List of columns (default: all numeric); non-numeric
+            columns get NaN statistics
+
+    Returns:
+        DataFrame indexed by column with count, mean, std, min, q25, median,
+        q75, max, skewness, kurtosis
+    """
+    if columns is None:
+        columns = select_numeric_columns(df)
+
+    numeric = [c for c in columns if pd.api.types.is_numeric_dtype(df[c])]
+    V = np.ascontiguousarray(
+        df[numeric].to_numpy(dtype=np.float64, na_value=np.nan).T
+    )
+    stats = pd.DataFrame(_column_stats(V), index=pd.Index(numeric))
+    return stats.reindex(columns)
+
+
 # =============================================================================
 # Column Name Cleaning
 # =============================================================================
@@ -312,6 +438,48 @@ def add_diff(
     return df
 
 
+def group_shift_index(codes: np.ndarray, lag: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Source row index and validity mask for shifting by `lag` positions within
+    groups, for rows sorted so that each group is contiguous.
+
+    Args:
+        codes: Group codes per row (e.g. from pd.factorize); -1 = no group
+
+    Returns:
+        Tuple (src, valid) - row i takes row src[i] where valid[i]
+    """
+    rows = np.arange(len(codes))
+    src = rows - lag
+    valid = (src >= 0) & (src < len(codes)) & (codes != -1)
+    src = np.clip(src, 0, max(len(codes) - 1, 0))
+    valid &= codes[src] == codes
+    return src, valid
+
+
+def group_shift(
+    values: np.ndarray,
+    codes: np.ndarray,
+    lag: int = 1,
+    index: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Vectorized equivalent of groupby().shift(lag) on group-contiguous rows.
+
+    One gather plus a boundary mask instead of per-group dispatch; rows whose
+    source lies in another group (or that have no group) get NaN.
+
+    Args:
+        values: Column values (converted to float64)
+        codes: Group codes per row; -1 = no group
+        lag: Number of positions to shift
+        index: Precomputed group_shift_index(codes, lag), reused across columns
+    """
+    src, valid = index if index is not None else group_shift_index(codes, lag)
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(valid, values[src], np.nan)
+
+
 def add_quantile_bins(
     df: pd.DataFrame,
     col: str,
@@ -464,7 +632,10 @@ def impute_interpolate(
     if sort_by:
         df = df.sort_values([group_by, sort_by] if group_by else [sort_by])
 
-    if group_by:
+    if method == "linear" and pd.api.types.is_float_dtype(df[col]):
+        # numpy pass over group-contiguous rows instead of a per-group lambda
+        df[col] = _fill_by_group(df, col, group_by, linear=True, backfill=False)
+    elif group_by:
         df[col] = df.groupby(group_by)[col].transform(
             lambda x: x.interpolate(method=method)
         )
@@ -483,7 +654,9 @@ def impute_forward_backward(
     """
     df = df.copy()
 
-    if group_by:
+    if pd.api.types.is_float_dtype(df[col]):
+        df[col] = _fill_by_group(df, col, group_by, linear=False, backfill=True)
+    elif group_by:
         df[col] = df.groupby(group_by)[col].transform(lambda x: x.ffill().bfill())
     else:
         df[col] = df[col].ffill().bfill()
@@ -491,11 +664,130 @@ def impute_forward_backward(
     return df
 
 
+def _fill_by_group(
+    df: pd.DataFrame, col: str, group_by: Optional[str], linear: bool, backfill: bool
+) -> np.ndarray:
+    """
+    Run interpolate_fill_grouped on `col` with rows in stable group order,
+    returning values in the original row order and dtype. Rows without a
+    group keep their values.
+    """
+    if group_by:
+        codes, _ = pd.factorize(df[group_by], sort=False)
+    else:
+        codes = np.zeros(len(df), dtype=np.intp)
+
+    values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    order = np.argsort(codes, kind="stable")
+    out = np.empty_like(values)
+    out[order] = interpolate_fill_grouped(values[order], codes[order], linear=linear, backfill=backfill)
+    return out.astype(df[col].dtype, copy=False)
+
+
+def interpolate_fill_grouped(
+    values: np.ndarray,
+    codes: np.ndarray,
+    linear: bool = True,
+    backfill: bool = True,
+) -> np.ndarray:
+    """
+    Vectorized equivalent of per-group interpolate(method="linear") followed by
+    ffill().bfill(), for rows sorted so that each group is contiguous.
+
+    Interior gaps are interpolated linearly by position (as np.interp does),
+    trailing gaps take the last valid value and leading gaps the first one.
+    Groups without any valid value, and rows without a group, stay as they are.
+
+    Args:
+        values: Column values (converted to float64)
+        codes: Group codes per row (e.g. from pd.factorize); -1 = no group
+        linear: Interpolate interior gaps; False = forward fill them (ffill)
+        backfill: Fill leading gaps with the first valid value (bfill)
+    """
+    out = np.array(values, dtype=np.float64)
+    n = len(out)
+    gap = np.isnan(out) & (codes != -1)
+    if n == 0 or not gap.any():
+        return out
+
+    # Nearest valid row before / after each position (running max / min)
+    rows = np.arange(n)
+    known = ~np.isnan(out) & (codes != -1)
+    prev = np.maximum.accumulate(np.where(known, rows, -1))
+    nxt = np.minimum.accumulate(np.where(known, rows, n)[::-1])[::-1]
+
+    has_prev = prev >= 0
+    has_next = nxt < n
+    has_prev[has_prev] &= codes[prev[has_prev]] == codes[has_prev]
+    has_next[has_next] &= codes[nxt[has_next]] == codes[has_next]
+
+    pos = np.flatnonzero(gap)
+    p, q = prev[pos], nxt[pos]
+    hp, hn = has_prev[pos], has_next[pos]
+    f0 = out[np.where(hp, p, 0)]
+    f1 = out[np.where(hn, q, 0)]
+
+    filled = np.full(len(pos), np.nan)
+    filled[hp] = f0[hp]
+    if linear:
+        both = hp & hn
+        # Same operation order as np.interp (slope * dx + f0)
+        slope = (f1[both] - f0[both]) / (q[both] - p[both])
+        filled[both] = slope * (pos[both] - p[both]) + f0[both]
+    if backfill:
+        filled[hn & ~hp] = f1[hn & ~hp]
+
+    out[pos] = filled
+    return out
+
+
 # =============================================================================
 # Correlation Analysis
 # =============================================================================
 
 
+def _pearson_pairwise(X: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation matrix of the columns of X using pairwise-complete
+    observations (same semantics as DataFrame.corr), computed with matrix
+    products instead of a per-pair loop.
+    """
+    mask = ~np.isnan(X)
+    M = mask.astype(np.float64)
+
+    # Shift by column means first - correlation is shift-invariant and the
+    # sums below lose less precision on centered data
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.where(mask, X, 0.0).sum(axis=0) / M.sum(axis=0)
+    Xc = np.where(mask, X - means, 0.0)
+
+    # n[i, j] = rows where both i and j are present; sx[i, j] = sum of x_i
+    # over those rows; sxx[i, j] = sum of x_i**2 over those rows
+    n = M.T @ M
+    sx = Xc.T @ M
+    sxx = (Xc * Xc).T @ M
+    sxy = Xc.T @ Xc
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sx.T / n
+        ssq = sxx - sx * sx / n
+
+    # The one-pass sum of squares cancels when x_i is (nearly) constant on
+    # the rows shared with x_j - what is left is rounding noise, not
+    # variance. Treat it as zero so the pair is NaN, like DataFrame.corr
+    zero = ~(ssq > n * np.finfo(np.float64).eps * sxx)
+    zero |= zero.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.clip(cov / np.sqrt(np.where(zero, 1.0, ssq * ssq.T)), -1.0, 1.0)
+    corr[zero | (n < 1)] = np.nan
+
+    # Self-correlation is exactly 1 for every non-constant column
+    diag = np.diagonal(corr).copy()
+    diag[~np.isnan(diag)] = 1.0
+    np.fill_diagonal(corr, diag)
+    return corr
+
+
 def correlation_matrix(
     df: pd.DataFrame, columns: Optional[List[str]] = None, method: str = "pearson"
 ) -> pd.DataFrame:
@@ -509,9 +801,42 @@ def correlation_matrix(
     if columns is None:
         columns = select_numeric_columns(df)
 
+    if method == "pearson":
+        X = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        return pd.DataFrame(_pearson_pairwise(X), index=columns, columns=columns)
+
     return df[columns].corr(method=method)
 
 
+def top_correlations_from_matrix(corr: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """
+    Get top N strongest correlations from an existing correlation matrix
+    (upper triangle only, NaN pairs skipped).
+
+    Returns:
+        DataFrame with columns: var1, var2, correlation
+    """
+    values = corr.to_numpy()
+    i, j = np.triu_indices_from(values, k=1)
+    r = values[i, j]
+
+    valid = ~np.isnan(r)
+    i, j, r = i[valid], j[valid], r[valid]
+    abs_r = np.abs(r)
+
+    # Top-k by |r| without sorting all pairs
+    k = min(n, len(r))
+    top = np.argpartition(-abs_r, k - 1)[:k] if 0 < k < len(r) else np.arange(k)
+    top = top[np.argsort(-abs_r[top], kind="stable")]
+
+    names = corr.columns.to_numpy()
+    return pd.DataFrame({
+        "var1": names[i[top]],
+        "var2": names[j[top]],
+        "correlation": r[top],
+    })
+
+
 def top_correlations(
     df: pd.DataFrame, n: int = 20, method: str = "pearson"
 ) -> pd.DataFrame:
@@ -522,21 +847,7 @@ def top_correlations(
         DataFrame with columns: var1, var2, correlation
     """
     corr = correlation_matrix(df, method=method)
-
-    # Get upper triangle (excluding diagonal)
-    upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
-
-    # Stack and sort
-    pairs = upper.stack().reset_index()
-    pairs.columns = ["var1", "var2", "correlation"]
-    pairs["abs_corr"] = pairs["correlation"].abs()
-
-    return (
-        pairs.sort_values("abs_corr", ascending=False)
-        .head(n)
-        .drop(columns=["abs_corr"])
-        .reset_index(drop=True)
-    )
+    return top_correlations_from_matrix(corr, n=n)
 
 
 # =============================================================================
@@ -123,6 +123,7 @@ def write_parquet(
     path: str,
     compression: str = "snappy",
     index: bool = False,
+    **kwargs,
 ):
     """
     Write DataFrame to Parquet file.
@@ -130,13 +131,49 @@ def write_parquet(
     Args:
         df: pandas DataFrame
         path: Output path
-        compression: Compression codec ('snappy', 'gzip', 'brotli', None)
+        compression: Compression codec ('snappy', 'gzip', 'brotli', 'zstd', None)
         index: Whether to include index
+        **kwargs: Passed through to pyarrow (e.g. compression_level,
+            row_group_size, use_dictionary)
     """
     import pandas as pd
 
     ensure_parent_dir(path)
-    df.to_parquet(path, compression=compression, index=index)
+    df.to_parquet(path, compression=compression, index=index, **kwargs)
+
+
+def write_parquet_chunked(
+    df,  # pd.DataFrame
+    path: str,
+    chunk_size: int = 200_000,
+    compression: str = "zstd",
+    **kwargs,
+):
+    """
+    Write DataFrame to Parquet file one row group at a time.
+
+    Only one chunk is converted to Arrow at once, so peak memory is bounded
+    by the chunk size instead of the whole frame.
+
+    Args:
+        df: pandas DataFrame
+        path: Output path
+        chunk_size: Rows per chunk (one row group each)
+        compression: Compression codec ('snappy', 'gzip', 'brotli', 'zstd', None)
+        **kwargs: Passed through to pyarrow.parquet.ParquetWriter (e.g.
+            compression_level, use_dictionary, write_statistics)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    ensure_parent_dir(path)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema, compression=compression, **kwargs) as writer:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False, safe=False)
+            )
 
 
 def read_parquet(
@@ -176,6 +213,35 @@ def write_csv(
     df.to_csv(path, index=index, encoding=encoding)
 
 
+def write_csv_arrow(
+    df,  # pd.DataFrame
+    path: str,
+    batch_size: int = 8192,
+):
+    """
+    Write DataFrame to CSV file with pyarrow's C++ CSV writer.
+
+    Much faster than DataFrame.to_csv() on wide numeric frames. Output
+    differs only cosmetically: string values and headers are quoted and
+    whole floats are written without a trailing ".0". Falls back to
+    DataFrame.to_csv() for columns Arrow cannot convert or write.
+
+    Args:
+        df: pandas DataFrame (index is not written)
+        path: Output path
+        batch_size: Rows converted to text per batch
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    ensure_parent_dir(path)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(table, path, write_options=pacsv.WriteOptions(batch_size=batch_size))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        df.to_csv(path, index=False)
+
+
 def read_csv(
     path: str,
     encoding: str = "utf-8",
@@ -0,0 +1,93 @@
+# src/utils/plot_jobs.py
+"""
+Rendering batches of plots, optionally in worker processes.
+Each job names a utils.plotting function, so only the function name and the
+columns it needs are pickled - not figures or the whole DataFrame.
+"""
+
+import os
+import sys
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+# Source file of utils.plotting - lets report digests cover the plotting
+# code without importing matplotlib
+PLOTTING_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plotting.py")
+
+
+def lazy_plotting():
+    """
+    Import utils.plotting (matplotlib + seaborn, ~300 ms) on first use, so
+    code paths that skip plotting do not pay for the import. The Agg backend
+    is selected before pyplot is first imported to skip GUI backend detection.
+    """
+    if "matplotlib.pyplot" not in sys.modules:
+        import matplotlib
+        matplotlib.use("Agg")
+    from utils import plotting
+    return plotting
+
+
+def render_plot(
+    plot_name: str,
+    data: pd.DataFrame,
+    args: tuple,
+    kwargs: Dict,
+    name: str,
+    figures_dir: str
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Draw and save a single plot (also runs inside worker processes).
+
+    Args:
+        plot_name: Name of the utils.plotting function
+        data: DataFrame passed as the first argument
+        args, kwargs: Remaining arguments of the plotting function
+        name: Output file name (without extension)
+        figures_dir: Output directory
+
+    Returns:
+        Tuple (path to the saved figure or None, error message or None)
+    """
+    plotting = None
+    open_before = set()
+    try:
+        plotting = lazy_plotting()
+        open_before = set(plotting.plt.get_fignums())
+        fig = getattr(plotting, plot_name)(data, *args, **kwargs)
+        return plotting.save_figure(fig, name, figures_dir=figures_dir), None
+    except Exception as e:
+        # save_figure closes the figure; after a drawing error close the
+        # figures opened by this call so they do not stay in memory
+        if plotting is not None:
+            for num in set(plotting.plt.get_fignums()) - open_before:
+                plotting.plt.close(num)
+        return None, str(e)
+
+
+def render_plots(jobs: List[tuple], figures_dir: str, executor: Optional[Executor] = None) -> List[str]:
+    """
+    Render jobs of the form (plot function name, data, args, kwargs, file
+    name, error label) - in parallel when an executor is given. Errors are
+    printed as "    <error label>: <message>".
+
+    Returns:
+        List of saved figure paths (in job order)
+    """
+    calls = [(plot, data, args, kwargs, name, figures_dir) for plot, data, args, kwargs, name, _ in jobs]
+    if executor is not None:
+        futures = [executor.submit(render_plot, *call) for call in calls]
+        results = [future.result() for future in futures]
+    else:
+        results = [render_plot(*call) for call in calls]
+
+    saved_plots = []
+    for job, (path, error) in zip(jobs, results):
+        if error is not None:
+            print(f"    {job[-1]}: {error}")
+        else:
+            saved_plots.append(path)
+    return saved_plots
@@ -81,13 +81,15 @@ def save_figure(
     Path(figures_dir).mkdir(parents=True, exist_ok=True)
 
     primary_path = None
-    for fmt in formats:
-        path = os.path.join(figures_dir, f"{name}.{fmt}")
-        fig.savefig(path, dpi=dpi, bbox_inches="tight", facecolor="white")
-        if primary_path is None:
-            primary_path = path
-
-    plt.close(fig)
+    try:
+        for fmt in formats:
+            path = os.path.join(figures_dir, f"{name}.{fmt}")
+            fig.savefig(path, dpi=dpi, bbox_inches="tight", facecolor="white")
+            if primary_path is None:
+                primary_path = path
+    finally:
+        # Release renderer state even if saving fails
+        plt.close(fig)
     return primary_path
 
 
@@ -415,7 +417,7 @@ def plot_trends_by_group(
     """
     fig, ax = plt.subplots(figsize=figsize)
 
-    agg_df = df.groupby([x, group])[y].agg(agg_func).reset_index()
+    agg_df = df.groupby([x, group], observed=True)[y].agg(agg_func).reset_index()
 
     if groups_to_show:
         agg_df = agg_df[agg_df[group].isin(groups_to_show)]
@@ -7,14 +7,55 @@ Extends MarkdownBuilder with data analysis specific features.
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional, List, Union, Any
+from typing import Optional, List, Union, Any, Iterable
 import os
+import hashlib
 from datetime import datetime
 
-from constants import REPORT_DIR
+from constants import REPORT_DIR, OUT_DIR
 from .df import df_info, df_missing_summary, df_describe_all
 
 
+# =============================================================================
+# Table Formatting
+# =============================================================================
+
+
+def markdown_table(
+    headers: List[str], rows: Iterable[Iterable[Any]], float_format: int = 2
+) -> str:
+    """
+    Render rows as a Markdown pipe table with a plain string join.
+
+    Skips tabulate's per-cell type detection and column padding, so it is
+    much cheaper than DataFrame.to_markdown() for tables of already rounded
+    values (e.g. rows from df.itertuples(index=False, name=None)).
+
+    Args:
+        headers: Column headers
+        rows: Row values in header order
+        float_format: Number of decimal places for floats (NaN rendered empty)
+    """
+
+    def fmt(value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, (float, np.floating)):
+            if np.isnan(value):
+                return ""
+            return f"{value:.{float_format}f}"
+        return str(value).replace("|", "\\|")
+
+    lines = [
+        "| " + " | ".join(fmt(h) for h in headers) + " |",
+        "|" + "|".join("---" for _ in headers) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(fmt(value) for value in row) + " |")
+
+    return "\n".join(lines)
+
+
 # =============================================================================
 # ReportBuilder Class
 # =============================================================================
@@ -157,6 +198,36 @@ class ReportBuilder:
 
         return self
 
+    def add_dict_table(
+        self,
+        rows: List[dict],
+        caption: Optional[str] = None,
+        float_format: int = 2,
+    ) -> "ReportBuilder":
+        """
+        Add list of dicts as Markdown table without building a DataFrame.
+
+        Intended for small summary tables, where DataFrame construction
+        costs more than the formatting itself.
+
+        Args:
+            rows: List of row dicts (columns in first-seen key order)
+            caption: Table caption
+            float_format: Number of decimal places for floats
+        """
+        self._table_count += 1
+
+        if caption:
+            self.add_paragraph(f"**Table {self._table_count}:** {caption}")
+
+        headers = list(dict.fromkeys(key for row in rows for key in row))
+        table_md = markdown_table(
+            headers, ([row.get(h) for h in headers] for row in rows), float_format
+        )
+
+        self.contents.append(table_md + "\n")
+        return self
+
     def add_simple_table(
         self, headers: List[str], rows: List[List[Any]]
     ) -> "ReportBuilder":
@@ -401,12 +472,14 @@ class ReportBuilder:
         """Get report as string."""
         return "\n".join(self.contents)
 
-    def save(self, path: str) -> str:
+    def save(self, path: str, digest: Optional[str] = None) -> str:
         """
         Save report to file.
 
         Args:
             path: Output path (relative to REPORT_DIR if not absolute)
+            digest: Input digest (see report_digest) stored under
+                OUT_DIR/report_cache, so cached_report can skip rebuilding
 
         Returns:
             Absolute path to saved file
@@ -419,6 +492,12 @@ class ReportBuilder:
         with open(path, "w", encoding="utf-8") as f:
             f.write(self.to_string())
 
+        if digest is not None:
+            digest_path = _digest_path(path)
+            Path(digest_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(digest_path, "w", encoding="utf-8") as f:
+                f.write(digest)
+
         print(f"Report saved: {path}")
         return path
 
@@ -426,6 +505,69 @@ class ReportBuilder:
         return self.to_string()
 
 
+# =============================================================================
+# Report Caching
+# =============================================================================
+
+
+def _digest_path(report_path: str) -> str:
+    """Digest file for a report - kept out of REPORT_DIR so it stays clean."""
+    return os.path.join(OUT_DIR, "report_cache", os.path.basename(report_path) + ".sha")
+
+
+def report_digest(*inputs: Any, source: Union[str, Iterable[str], None] = None) -> str:
+    """
+    Content hash of the inputs a report is generated from.
+
+    DataFrames are hashed by value (pd.util.hash_pandas_object) together with
+    their columns and dtypes, other inputs by repr(). The bytes of the
+    `source` file(s) (typically the step module's __file__ and the utils it
+    relies on) and of this module are included as well, so editing the code
+    that builds the report invalidates previously saved reports.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for item in inputs:
+        if isinstance(item, pd.DataFrame):
+            h.update(repr((item.shape, list(item.columns), [str(t) for t in item.dtypes])).encode())
+            h.update(pd.util.hash_pandas_object(item, index=False).to_numpy().tobytes())
+        else:
+            h.update(repr(item).encode())
+        h.update(b"\0")
+
+    sources = [] if source is None else [source] if isinstance(source, str) else list(source)
+    for path in [*sources, __file__]:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def cached_report(path: str, digest: str) -> Optional[str]:
+    """
+    Return the absolute report path if it was saved with the same digest.
+
+    Args:
+        path: Report path (relative to REPORT_DIR if not absolute)
+        digest: Digest of the current inputs (see report_digest)
+
+    Returns:
+        Path to the up-to-date report, or None if it has to be regenerated
+    """
+    if not os.path.isabs(path):
+        path = os.path.join(REPORT_DIR, path)
+
+    try:
+        with open(_digest_path(path), encoding="utf-8") as f:
+            saved = f.read().strip()
+    except OSError:
+        return None
+
+    if saved != digest or not os.path.exists(path):
+        return None
+
+    print(f"Report up to date: {path}")
+    return path
+
+
 # =============================================================================
 # Standalone Functions
 # =============================================================================